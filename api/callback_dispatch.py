@@ -1,6 +1,9 @@
 """
-Inbound message dispatch: long-lived Telethon client per authorized tenant, POST to
-callback_url on each NewMessage(incoming=True), with HMAC signing and retries.
+Inbound message dispatch: each authorized tenant's pooled Telethon client (shared with
+API calls, see telethon_manager.acquire_client) stays connected; each
+NewMessage(incoming=True) is queued and POSTed to callback_url in batches (up to
+CALLBACK_BATCH_SIZE events or every CALLBACK_FLUSH_INTERVAL_SEC), with HMAC signing
+and retries.
 
 **Why MTProto doesn't use Telegram webhooks for user accounts:**
 Telegram's Bot API offers webhooks: you set a URL, Telegram POSTs updates to it. That
@@ -21,50 +24,118 @@ handle the MTProto connection and update loop ourselves.
 from __future__ import annotations
 
 import asyncio
-import hashlib
 import hmac
-import json
 import logging
+import random
+import time
 import uuid
 from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
 from typing import Any
 
 import httpx
-from sqlalchemy import select
+import orjson
+from sqlalchemy import func, select, update
 from sqlalchemy.orm import Session
 from telethon import events
+from telethon.tl import functions
 from telethon.tl.types import User
 
 from config import CALLBACK_SIGNING_SECRET
-from database import SessionLocal
+from database import SessionLocal, engine
 from models.tenant import Tenant
 from models.tenant_auth import TenantAuth
-from models.message import Message
-from telethon_manager import build_client
+from message_writer import persist_messages
+from telethon_manager import acquire_client
 
 logger = logging.getLogger(__name__)
 
-_clients: dict[uuid.UUID, Any] = {}
 _tasks: dict[uuid.UUID, asyncio.Task[None]] = {}
+# Queued item: (callback event payload, message row for the `message` table)
+_QueueItem = tuple[dict[str, Any], dict[str, Any]]
+_queues: dict[uuid.UUID, asyncio.Queue[_QueueItem]] = {}
+_inflight: dict[uuid.UUID, set[asyncio.Task[bool]]] = {}
+# Per-tenant circuit breaker: {"fails": consecutive failed attempts, "opened_at": monotonic | None}
+_breaker: dict[uuid.UUID, dict[str, Any]] = {}
+# (tenant_id, url) pairs that answered 410 Gone (persisted as Tenant.callback_disabled_at):
+# not POSTed to until re-enabled (see reenable_callback). The dispatcher keeps running and
+# storing inbound messages. Per tenant: another tenant's 410 must not silence this one.
+_dead_urls: set[tuple[uuid.UUID, str]] = set()
+# Callback POST tasks currently sleeping between attempts (backoff or Retry-After); a
+# stopping dispatcher cancels these at once instead of waiting them out.
+_retry_sleeping: set[asyncio.Task[Any]] = set()
+# Only guards start_dispatcher's check-then-create. Plain dict reads/writes need no lock:
+# the event loop is single-threaded and they never await in between.
 _lock = asyncio.Lock()
+_http_client: httpx.AsyncClient | None = None
 
 CALLBACK_MAX_ATTEMPTS = 5
 CALLBACK_INITIAL_BACKOFF_SEC = 1.0
 CALLBACK_BACKOFF_MULTIPLIER = 2.0
+CALLBACK_BACKOFF_CAP_SEC = 60.0
+CALLBACK_RETRY_AFTER_MAX_SEC = 300.0
 CALLBACK_TIMEOUT_SEC = 30.0
+CALLBACK_STOP_DRAIN_SEC = 2.0  # grace for POSTs on the wire when a dispatcher stops
+CALLBACK_MAX_KEEPALIVE_CONNECTIONS = 20
+CALLBACK_MAX_CONNECTIONS = 100
+CALLBACK_BATCH_SIZE = 50
+CALLBACK_FLUSH_INTERVAL_SEC = 2.0
+CALLBACK_QUEUE_MAXSIZE = 10_000
+CALLBACK_OFFLOAD_MIN_EVENTS = 20  # batches larger than this are serialized off-loop
+CALLBACK_MAX_CONCURRENCY_PER_TENANT = 4
+CALLBACK_BREAKER_THRESHOLD = 10
+CALLBACK_BREAKER_COOLDOWN_SEC = 60.0
+
+
+def init_http_client() -> None:
+    """Create the shared httpx client used for all callback POSTs (call on app startup)."""
+    global _http_client
+    if _http_client is None:
+        _http_client = httpx.AsyncClient(
+            timeout=CALLBACK_TIMEOUT_SEC,
+            limits=httpx.Limits(
+                max_keepalive_connections=CALLBACK_MAX_KEEPALIVE_CONNECTIONS,
+                max_connections=CALLBACK_MAX_CONNECTIONS,
+            ),
+            http2=True,
+        )
+
+
+async def close_http_client() -> None:
+    """Close the shared httpx client (call on app shutdown)."""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+def _get_http_client() -> httpx.AsyncClient:
+    """Shared client; created lazily if the app lifespan did not initialize it."""
+    if _http_client is None:
+        init_http_client()
+    assert _http_client is not None
+    return _http_client
+
+
+# Encoded once at import; None when signing is disabled.
+_SIGNING_KEY: bytes | None = (CALLBACK_SIGNING_SECRET or "").strip().encode("utf-8") or None
 
 
 def _compute_signature(body: bytes) -> str:
     """HMAC-SHA256 of body with CALLBACK_SIGNING_SECRET; return hex digest."""
-    if not (CALLBACK_SIGNING_SECRET or "").strip():
+    if _SIGNING_KEY is None:
         return ""
-    raw = (CALLBACK_SIGNING_SECRET or "").strip().encode("utf-8")
-    sig = hmac.new(raw, body, hashlib.sha256).hexdigest()
-    return sig
+    # One-shot OpenSSL HMAC (no Python-level init/update/finalize).
+    return hmac.digest(_SIGNING_KEY, body, "sha256").hex()
+
+
+# UUIDs and datetimes are serialized natively; naive datetimes are treated as UTC and
+# UTC is emitted as "Z".
+_ORJSON_OPTS = orjson.OPT_NAIVE_UTC | orjson.OPT_UTC_Z | orjson.OPT_SERIALIZE_UUID
 
 
 def _build_headers_and_body(payload: dict[str, Any]) -> tuple[dict[str, str], bytes]:
-    body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    body = orjson.dumps(payload, option=_ORJSON_OPTS)
     signature = _compute_signature(body)
     headers: dict[str, str] = {"Content-Type": "application/json"}
     if signature:
@@ -72,27 +143,130 @@ def _build_headers_and_body(payload: dict[str, Any]) -> tuple[dict[str, str], by
     return headers, body
 
 
+async def _build_and_sign_async(payload: dict[str, Any]) -> tuple[dict[str, str], bytes]:
+    """
+    _build_headers_and_body, offloaded to the default executor for large batches so
+    serialization + HMAC don't stall the event loop while Telethon delivers updates.
+    """
+    if len(payload.get("events", ())) > CALLBACK_OFFLOAD_MIN_EVENTS:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, _build_headers_and_body, payload)
+    return _build_headers_and_body(payload)
+
+
+def _parse_retry_after(value: str | None) -> float | None:
+    """Retry-After as seconds (delta-seconds or HTTP-date), clamped to [0, CALLBACK_RETRY_AFTER_MAX_SEC]."""
+    if not value:
+        return None
+    value = value.strip()
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            when = parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        if when.tzinfo is None:
+            when = when.replace(tzinfo=timezone.utc)
+        seconds = (when - datetime.now(timezone.utc)).total_seconds()
+    return min(max(seconds, 0.0), CALLBACK_RETRY_AFTER_MAX_SEC)
+
+
+def _disable_callback(tenant_id: uuid.UUID, url: str) -> None:
+    """Persist Tenant.callback_disabled_at so the URL stays skipped after a restart."""
+    with SessionLocal() as db:
+        db.execute(
+            update(Tenant)
+            .where(Tenant.id == tenant_id, Tenant.callback_url == url)
+            .values(callback_disabled_at=func.now())
+        )
+        db.commit()
+
+
+async def _mark_callback_gone(tenant_id: uuid.UUID, url: str) -> None:
+    """Endpoint answered 410 Gone: stop POSTing to it, now and after restarts (until re-enabled)."""
+    if (tenant_id, url) in _dead_urls:
+        return
+    _dead_urls.add((tenant_id, url))
+    logger.warning("callback url gone (410), disabling tenant_id=%s url=%s", tenant_id, url)
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, _disable_callback, tenant_id, url)
+    except Exception as e:
+        logger.exception("failed to persist callback_disabled_at tenant_id=%s error=%s", tenant_id, e)
+
+
+def reenable_callback(tenant_id: uuid.UUID) -> None:
+    """
+    Resume POSTing for a tenant whose callback answered 410 Gone. Call after clearing
+    Tenant.callback_disabled_at (callback_url set or changed, or a test callback succeeded);
+    a running dispatcher picks it up with its next batch.
+    """
+    for key in [k for k in _dead_urls if k[0] == tenant_id]:
+        _dead_urls.discard(key)
+
+
+def _breaker_is_open(tenant_id: uuid.UUID) -> bool:
+    """
+    True while the tenant's breaker is open. Once the cooldown has elapsed the breaker is
+    half-open: attempts go through, and a single further failure re-opens it.
+    """
+    state = _breaker.get(tenant_id)
+    if state is None or state["opened_at"] is None:
+        return False
+    return (time.monotonic() - state["opened_at"]) < CALLBACK_BREAKER_COOLDOWN_SEC
+
+
+def _breaker_record_success(tenant_id: uuid.UUID) -> None:
+    _breaker.pop(tenant_id, None)
+
+
+def _breaker_record_failure(tenant_id: uuid.UUID) -> None:
+    state = _breaker.setdefault(tenant_id, {"fails": 0, "opened_at": None})
+    state["fails"] += 1
+    if state["fails"] >= CALLBACK_BREAKER_THRESHOLD:
+        if state["opened_at"] is None:
+            logger.error(
+                "callback circuit opened tenant_id=%s after %s consecutive failures",
+                tenant_id,
+                state["fails"],
+            )
+        state["opened_at"] = time.monotonic()
+
+
 async def _post_callback(
     url: str,
     payload: dict[str, Any],
     tenant_id: uuid.UUID,
 ) -> bool:
     """
-    POST payload to url with X-Signature header. Retry on 5xx with exponential backoff;
-    drop after CALLBACK_MAX_ATTEMPTS. Log failures. Returns True if any attempt succeeded.
+    POST payload to url with X-Signature header. Retry on 5xx with full-jitter exponential
+    backoff (sleep uniformly in [0, min(cap, base * mult**n)]) so retries from many
+    dispatchers don't synchronize; drop after CALLBACK_MAX_ATTEMPTS. Log failures.
+    Skipped entirely while the tenant's circuit breaker is open.
+    Returns True if any attempt succeeded.
     """
-    headers, body = _build_headers_and_body(payload)
+    if (tenant_id, url) in _dead_urls:
+        return False
+    headers, body = await _build_and_sign_async(payload)
 
     last_exc: Exception | None = None
-    backoff = CALLBACK_INITIAL_BACKOFF_SEC
 
     for attempt in range(1, CALLBACK_MAX_ATTEMPTS + 1):
+        if _breaker_is_open(tenant_id):
+            logger.warning(
+                "callback dropped, circuit open tenant_id=%s url=%s", tenant_id, url
+            )
+            return False
+        retry_after: float | None = None
         try:
-            async with httpx.AsyncClient(timeout=CALLBACK_TIMEOUT_SEC) as client:
-                r = await client.post(url, content=body, headers=headers)
+            r = await _get_http_client().post(url, content=body, headers=headers)
             if 200 <= r.status_code < 300:
+                _breaker_record_success(tenant_id)
                 return True
-            if r.status_code < 500:
+            if r.status_code == 410:
+                await _mark_callback_gone(tenant_id, url)
+                return False
+            if r.status_code < 500 and r.status_code != 429:
                 logger.warning(
                     "callback non-retryable failure tenant_id=%s url=%s status=%s",
                     tenant_id,
@@ -101,8 +275,15 @@ async def _post_callback(
                 )
                 return False
             last_exc = RuntimeError(f"HTTP {r.status_code}")
-        except Exception as e:
+            if r.status_code in (429, 503):
+                retry_after = _parse_retry_after(r.headers.get("Retry-After"))
+            if r.status_code != 429:
+                # 429 means the endpoint is up but throttling us; don't trip the breaker.
+                _breaker_record_failure(tenant_id)
+        except httpx.TransportError as e:
+            # Connect/read/write errors and timeouts are all transient: same retry policy.
             last_exc = e
+            _breaker_record_failure(tenant_id)
             logger.warning(
                 "callback attempt %s/%s tenant_id=%s url=%s error=%s",
                 attempt,
@@ -111,10 +292,31 @@ async def _post_callback(
                 url,
                 e,
             )
+        except Exception as e:
+            logger.exception(
+                "callback non-retryable error tenant_id=%s url=%s error=%s", tenant_id, url, e
+            )
+            return False
 
         if attempt < CALLBACK_MAX_ATTEMPTS:
-            await asyncio.sleep(backoff)
-            backoff *= CALLBACK_BACKOFF_MULTIPLIER
+            if retry_after is not None:
+                # Endpoint told us when to come back; add a little jitter on top.
+                delay = retry_after + random.uniform(0, CALLBACK_INITIAL_BACKOFF_SEC)
+            else:
+                delay = random.uniform(
+                    0,
+                    min(
+                        CALLBACK_BACKOFF_CAP_SEC,
+                        CALLBACK_INITIAL_BACKOFF_SEC * (CALLBACK_BACKOFF_MULTIPLIER ** (attempt - 1)),
+                    ),
+                )
+            task = asyncio.current_task()
+            assert task is not None
+            _retry_sleeping.add(task)
+            try:
+                await asyncio.sleep(delay)
+            finally:
+                _retry_sleeping.discard(task)
 
     logger.error(
         "callback dropped after %s attempts tenant_id=%s url=%s last_error=%s",
@@ -133,8 +335,8 @@ async def send_test_callback(tenant_id: uuid.UUID, callback_url: str) -> tuple[b
     """
     from datetime import datetime, timezone
 
-    payload: dict[str, Any] = {
-        "tenant_id": str(tenant_id),
+    event: dict[str, Any] = {
+        "tenant_id": tenant_id,
         "event": "message",
         "message": {
             "chat_id": 0,
@@ -142,13 +344,12 @@ async def send_test_callback(tenant_id: uuid.UUID, callback_url: str) -> tuple[b
             "sender_id": 0,
             "sender_username": "test",
             "text": "Test callback from Grey TG admin.",
-            "date": datetime.now(timezone.utc).isoformat(),
+            "date": datetime.now(timezone.utc),
         },
     }
-    headers, body = _build_headers_and_body(payload)
+    headers, body = _build_headers_and_body(_batch_payload(tenant_id, [event]))
     try:
-        async with httpx.AsyncClient(timeout=CALLBACK_TIMEOUT_SEC) as c:
-            r = await c.post(callback_url, content=body, headers=headers)
+        r = await _get_http_client().post(callback_url, content=body, headers=headers)
         if 200 <= r.status_code < 300:
             return True, ""
         return False, f"HTTP {r.status_code}"
@@ -159,17 +360,20 @@ async def send_test_callback(tenant_id: uuid.UUID, callback_url: str) -> tuple[b
 def _payload_from_event(tenant_id: uuid.UUID, event: events.NewMessage.Event) -> dict[str, Any]:
     msg = event.message
     sender = event.sender
-    sender_id: int | None = getattr(sender, "id", None) if sender else event.sender_id
     sender_username: str | None = None
-    if isinstance(sender, User) and getattr(sender, "username", None):
-        sender_username = str(sender.username)
-    date_val = msg.date
-    date_str = date_val.isoformat() if hasattr(date_val, "isoformat") else str(date_val)
-    text = (msg.text or "").strip() if msg.text else ""
-    message_id: int = getattr(msg, "id", 0) or 0
+    if type(sender) is User:
+        # Telethon hands back concrete User objects: exact type check, direct attributes.
+        sender_id: int | None = sender.id
+        sender_username = sender.username
+    else:
+        sender_id = getattr(sender, "id", None) if sender else event.sender_id
+    # msg.text re-renders entities on every access; read it once.
+    text = msg.text
+    text = text.strip() if text else ""
+    message_id: int = msg.id or 0
 
     return {
-        "tenant_id": str(tenant_id),
+        "tenant_id": tenant_id,
         "event": "message",
         "message": {
             "chat_id": event.chat_id,
@@ -177,11 +381,82 @@ def _payload_from_event(tenant_id: uuid.UUID, event: events.NewMessage.Event) ->
             "sender_id": sender_id,
             "sender_username": sender_username,
             "text": text,
-            "date": date_str,
+            "date": msg.date,
         },
     }
 
 
+def _batch_payload(tenant_id: uuid.UUID, batch: list[dict[str, Any]]) -> dict[str, Any]:
+    """Envelope for one callback POST: {"tenant_id": ..., "events": [<message payload>, ...]}."""
+    return {"tenant_id": tenant_id, "events": batch}
+
+
+async def _guarded_post(
+    sem: asyncio.Semaphore,
+    url: str,
+    payload: dict[str, Any],
+    tenant_id: uuid.UUID,
+) -> bool:
+    """Run _post_callback and release the slot acquired by the flusher when done."""
+    try:
+        return await _post_callback(url, payload, tenant_id)
+    finally:
+        sem.release()
+
+
+async def _batch_flusher(
+    tenant_id: uuid.UUID,
+    url: str,
+    queue: asyncio.Queue[_QueueItem],
+    inflight: set[asyncio.Task[bool]],
+) -> None:
+    """
+    Drain queue into batches: once CALLBACK_BATCH_SIZE events are collected or
+    CALLBACK_FLUSH_INTERVAL_SEC has passed since the first event of the batch, store
+    the batch with one multi-row INSERT and POST it.
+
+    Each POST (with its retries) runs as a tracked task so batching continues while
+    an endpoint is slow; at most CALLBACK_MAX_CONCURRENCY_PER_TENANT POSTs are in
+    flight, after which the flusher waits and the queue absorbs (then drops) events.
+    """
+    sem = asyncio.Semaphore(CALLBACK_MAX_CONCURRENCY_PER_TENANT)
+    loop = asyncio.get_running_loop()
+    pending: list[_QueueItem] = []
+    try:
+        while True:
+            pending = [await queue.get()]
+            deadline = loop.time() + CALLBACK_FLUSH_INTERVAL_SEC
+            while len(pending) < CALLBACK_BATCH_SIZE:
+                # Take whatever is already queued without suspending; only wait (one
+                # wakeup) once the queue is empty.
+                while not queue.empty() and len(pending) < CALLBACK_BATCH_SIZE:
+                    pending.append(queue.get_nowait())
+                if len(pending) >= CALLBACK_BATCH_SIZE:
+                    break
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    pending.append(await asyncio.wait_for(queue.get(), timeout=timeout))
+                except asyncio.TimeoutError:
+                    break
+            batch, pending = pending, []
+            await _persist_rows(tenant_id, [row for _, row in batch])
+            if (tenant_id, url) in _dead_urls:
+                continue  # callback disabled (410 Gone): store only
+            await sem.acquire()
+            task = asyncio.create_task(
+                _guarded_post(sem, url, _batch_payload(tenant_id, [p for p, _ in batch]), tenant_id)
+            )
+            inflight.add(task)
+            task.add_done_callback(inflight.discard)
+    except asyncio.CancelledError:
+        # Events already taken off the queue are still stored.
+        if pending:
+            await _persist_rows(tenant_id, [row for _, row in pending])
+        raise
+
+
 def _ensure_utc(dt: datetime) -> datetime:
     """Return timezone-aware datetime in UTC (Telethon uses naive UTC)."""
     if dt.tzinfo is not None:
@@ -189,100 +464,134 @@ def _ensure_utc(dt: datetime) -> datetime:
     return dt.replace(tzinfo=timezone.utc)
 
 
-async def _save_incoming_message(tenant_id: uuid.UUID, event: events.NewMessage.Event) -> None:
-    """Save incoming message to database with username, phone_number, and chat_id."""
-    try:
-        msg = event.message
-        sender = event.sender
-        
-        # Extract username
-        username: str | None = None
-        if isinstance(sender, User) and getattr(sender, "username", None):
-            username = str(sender.username)
-        
-        # Extract phone number
-        phone_number: str | None = None
-        if isinstance(sender, User) and getattr(sender, "phone", None):
-            phone_number = str(sender.phone)
-        
-        # Extract other fields
-        chat_id: int = event.chat_id
-        message_id: int = getattr(msg, "id", 0) or 0
-        sender_id: int | None = getattr(sender, "id", None) if sender else event.sender_id
-        text = (msg.text or "").strip() if msg.text else None
-        date_utc = _ensure_utc(msg.date)
-        
-        # Save to database (own session so we're not tied to request lifecycle)
-        with SessionLocal() as db:
-            message = Message(
-                tenant_id=tenant_id,
-                chat_id=chat_id,
-                message_id=message_id,
-                username=username,
-                phone_number=phone_number,
-                text=text,
-                sender_id=sender_id,
-                date=date_utc,
-                incoming=True,
-            )
-            db.add(message)
-            db.commit()
-            db.refresh(message)
-        logger.info(
-            "Saved incoming message tenant_id=%s chat_id=%s message_id=%s",
-            tenant_id,
-            chat_id,
-            message_id,
-        )
-    except Exception as e:
-        logger.exception("Failed to save incoming message tenant_id=%s error=%s", tenant_id, e)
+def _message_row(
+    tenant_id: uuid.UUID,
+    event: events.NewMessage.Event,
+    payload: dict[str, Any],
+) -> dict[str, Any]:
+    """`message` table row for an incoming event, reusing the fields already in payload."""
+    m = payload["message"]
+    sender = event.sender
+    phone_number: str | None = sender.phone if type(sender) is User else None
+    return {
+        "tenant_id": tenant_id,
+        "chat_id": m["chat_id"],
+        "message_id": m["message_id"],
+        "username": m["sender_username"],
+        "phone_number": phone_number or None,
+        "text": m["text"] or None,
+        "sender_id": m["sender_id"],
+        "date": _ensure_utc(m["date"]),
+        "incoming": True,
+    }
+
+
+async def _persist_rows(tenant_id: uuid.UUID, rows: list[dict[str, Any]]) -> None:
+    await persist_messages(rows, f"incoming tenant_id={tenant_id}")
 
 
 async def _run_dispatcher(tenant_id: uuid.UUID, callback_url: str) -> None:
-    client = build_client(tenant_id)
-    async with _lock:
-        _clients[tenant_id] = client
+    queue: asyncio.Queue[_QueueItem] = asyncio.Queue(maxsize=CALLBACK_QUEUE_MAXSIZE)
+    inflight: set[asyncio.Task[bool]] = set()
+    _queues[tenant_id] = queue
+    _inflight[tenant_id] = inflight
+    flusher: asyncio.Task[None] | None = None
+    event_filter = events.NewMessage(incoming=True)
 
     async def on_new_message(event: events.NewMessage.Event) -> None:
+        # Extract everything while the event is valid; storage and POST happen in the flusher.
         payload = _payload_from_event(tenant_id, event)
-        asyncio.create_task(_post_callback(callback_url, payload, tenant_id))
-        # Save message to database (await so it runs before handler returns and event is still valid)
-        await _save_incoming_message(tenant_id, event)
+        try:
+            queue.put_nowait((payload, _message_row(tenant_id, event, payload)))
+        except asyncio.QueueFull:
+            logger.warning("callback queue full, dropping event tenant_id=%s", tenant_id)
 
     try:
-        await client.connect()
-        if not await client.is_user_authorized():
-            logger.warning("dispatcher tenant_id=%s not authorized, skipping", tenant_id)
-            return
-        client.add_event_handler(on_new_message, events.NewMessage(incoming=True))
-        await client.run_until_disconnected()
+        # The tenant's pooled client, shared with API calls: one client (and MTProto
+        # connection) per auth key. Holding it keeps it out of the idle reaper; the
+        # dispatcher only detaches its handler on exit and never disconnects it.
+        async with acquire_client(tenant_id) as client:
+            if not await client.is_user_authorized():
+                logger.warning("dispatcher tenant_id=%s not authorized, skipping", tenant_id)
+                return
+            flusher = asyncio.create_task(_batch_flusher(tenant_id, callback_url, queue, inflight))
+            client.add_event_handler(on_new_message, event_filter)
+            try:
+                # Tell Telegram we want updates, then run until the connection is lost
+                # (`disconnected` is shielded, so cancelling us leaves the client intact).
+                await client(functions.updates.GetStateRequest())
+                await client.disconnected
+            finally:
+                client.remove_event_handler(on_new_message, event_filter)
     except asyncio.CancelledError:
         pass
     except Exception as e:
         logger.exception("dispatcher tenant_id=%s error=%s", tenant_id, e)
     finally:
-        try:
-            await client.disconnect()
-        except Exception:
-            pass
-        async with _lock:
-            _clients.pop(tenant_id, None)
-            _tasks.pop(tenant_id, None)
+        if flusher is not None:
+            flusher.cancel()
+            try:
+                await flusher
+            except asyncio.CancelledError:
+                pass
+        if inflight:
+            # Their events are already stored. POSTs waiting out a backoff or Retry-After
+            # (up to minutes) are dropped now; ones on the wire get CALLBACK_STOP_DRAIN_SEC,
+            # so stop_dispatcher (logout, shutdown) never waits on callback retries.
+            dropped = 0
+            for t in inflight & _retry_sleeping:
+                t.cancel()
+                dropped += 1
+            _, pending = await asyncio.wait(set(inflight), timeout=CALLBACK_STOP_DRAIN_SEC)
+            for t in pending:
+                t.cancel()
+            dropped += len(pending)
+            if dropped:
+                logger.warning(
+                    "dispatcher stopped with %s callback POSTs cancelled tenant_id=%s", dropped, tenant_id
+                )
+        if not queue.empty():
+            leftover = [queue.get_nowait() for _ in range(queue.qsize())]
+            logger.warning(
+                "dispatcher stopped with %s undelivered events tenant_id=%s",
+                len(leftover),
+                tenant_id,
+            )
+            await _persist_rows(tenant_id, [row for _, row in leftover])
+        _queues.pop(tenant_id, None)
+        _inflight.pop(tenant_id, None)
+        _tasks.pop(tenant_id, None)
 
 
-def _get_authorized_tenants_with_callback() -> list[tuple[uuid.UUID, str]]:
-    with SessionLocal() as db:
-        stmt = (
-            select(Tenant.id, Tenant.callback_url)
-            .join(TenantAuth, TenantAuth.tenant_id == Tenant.id)
-            .where(TenantAuth.authorized.is_(True), Tenant.callback_url.is_not(None))
+def _get_authorized_tenants_with_callback() -> list[tuple[uuid.UUID, str, bool]]:
+    """(tenant_id, callback_url, callback disabled by a 410) for every authorized tenant with a callback_url."""
+    stmt = (
+        select(Tenant.id, Tenant.callback_url, Tenant.callback_disabled_at)
+        .join(TenantAuth, TenantAuth.tenant_id == Tenant.id)
+        .where(
+            TenantAuth.authorized.is_(True),
+            Tenant.callback_url.is_not(None),
         )
-        rows = db.execute(stmt).all()
-    return [(r[0], r[1]) for r in rows if r[1]]
+    )
+    # Single read-only statement: a plain connection avoids ORM session setup.
+    with engine.connect() as conn:
+        rows = conn.execute(stmt).all()
+    return [(r[0], r[1], r[2] is not None) for r in rows if r[1]]
 
 
-async def start_dispatcher(tenant_id: uuid.UUID, callback_url: str) -> None:
-    """Start inbound dispatcher for tenant if not already running."""
+async def start_dispatcher(
+    tenant_id: uuid.UUID,
+    callback_url: str,
+    *,
+    callback_disabled: bool = False,
+) -> None:
+    """
+    Start inbound dispatcher for tenant if not already running. With callback_disabled
+    (Tenant.callback_disabled_at set) it still stores inbound messages but does not POST
+    them until reenable_callback.
+    """
+    if callback_disabled:
+        _dead_urls.add((tenant_id, callback_url))
     async with _lock:
         if tenant_id in _tasks:
             return
@@ -291,35 +600,38 @@ async def start_dispatcher(tenant_id: uuid.UUID, callback_url: str) -> None:
 
 
 async def stop_dispatcher(tenant_id: uuid.UUID) -> None:
-    """Stop dispatcher for tenant: disconnect client and cancel task."""
-    async with _lock:
-        task = _tasks.get(tenant_id)
-        client = _clients.get(tenant_id)
-    if client:
-        try:
-            await client.disconnect()
-        except Exception:
-            pass
+    """
+    Stop dispatcher for tenant: cancel its task, which detaches the event handler and
+    releases the pooled client (left connected for API calls; the pool owns it).
+    """
+    task = _tasks.get(tenant_id)
     if task:
         task.cancel()
         try:
             await task
         except asyncio.CancelledError:
             pass
-    async with _lock:
-        _clients.pop(tenant_id, None)
-        _tasks.pop(tenant_id, None)
+    _queues.pop(tenant_id, None)
+    _inflight.pop(tenant_id, None)
+    _tasks.pop(tenant_id, None)
 
 
 async def start_all_dispatchers() -> None:
     """Start dispatchers for all authorized tenants with callback_url (e.g. on app startup)."""
-    for tenant_id, callback_url in _get_authorized_tenants_with_callback():
-        await start_dispatcher(tenant_id, callback_url)
+    tenants = _get_authorized_tenants_with_callback()
+    results = await asyncio.gather(
+        *(
+            start_dispatcher(tenant_id, callback_url, callback_disabled=disabled)
+            for tenant_id, callback_url, disabled in tenants
+        ),
+        return_exceptions=True,
+    )
+    for (tenant_id, _, _), result in zip(tenants, results):
+        if isinstance(result, Exception):
+            logger.error("failed to start dispatcher tenant_id=%s error=%s", tenant_id, result)
 
 
 async def stop_all_dispatchers() -> None:
     """Stop all running dispatchers (e.g. on app shutdown)."""
-    async with _lock:
-        ids = list(_tasks.keys())
-    for tenant_id in ids:
-        await stop_dispatcher(tenant_id)
+    ids = list(_tasks.keys())
+    await asyncio.gather(*(stop_dispatcher(tenant_id) for tenant_id in ids))
@@ -13,8 +13,16 @@ if _raw.startswith("postgresql://") and not _raw.startswith("postgresql+"):
     _raw = _raw.replace("postgresql://", "postgresql+psycopg://", 1)
 DATABASE_URL = _raw
 
+# Connection pool per engine (the app has a sync and an async engine, so a worker can
+# hold up to 2 * (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections; keep under max_connections).
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "20"))
+DB_POOL_RECYCLE_SEC = int(os.getenv("DB_POOL_RECYCLE_SEC", "1800"))
+
 SESSION_ENC_KEY = os.getenv("SESSION_ENC_KEY", "")
 TELEGRAM_API_ID = os.getenv("TELEGRAM_API_ID", "")
 TELEGRAM_API_HASH = os.getenv("TELEGRAM_API_HASH", "")
 CALLBACK_SIGNING_SECRET = os.getenv("CALLBACK_SIGNING_SECRET", "")
+# Optional: shared per-tenant rate limiting across workers (needs the `redis` package).
+REDIS_URL = os.getenv("REDIS_URL", "")
 DEV_CALLBACK_RECEIVER = os.getenv("DEV_CALLBACK_RECEIVER", "").lower() in ("1", "true", "yes")
@@ -1,121 +1,114 @@
+import logging
+from collections.abc import AsyncIterator
+
 from sqlalchemy import create_engine, text
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import Session, sessionmaker
 
-from config import DATABASE_URL
+from config import DATABASE_URL, DB_MAX_OVERFLOW, DB_POOL_RECYCLE_SEC, DB_POOL_SIZE
 from models import Base, Tenant, TenantAuth, Message
 
-engine = create_engine(DATABASE_URL, echo=False)
+logger = logging.getLogger(__name__)
+
+engine = create_engine(
+    DATABASE_URL,
+    echo=False,
+    pool_pre_ping=True,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=30,
+    pool_recycle=DB_POOL_RECYCLE_SEC,
+)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for async endpoints so DB I/O does not block the event loop
+# (psycopg 3 serves both; same DATABASE_URL).
+async_engine = create_async_engine(
+    DATABASE_URL,
+    echo=False,
+    pool_pre_ping=True,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=30,
+    pool_recycle=DB_POOL_RECYCLE_SEC,
+)
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+# Index DDL, run after the column migrations with one transaction per statement: a
+# failed (slow, locked, denied) index build is logged and never rolls back a column.
+_INDEX_DDL = [
+    # Superseded covering index: its INCLUDE columns change on every auth call (no HOT
+    # updates) and an oversized last_error broke the insert. GET /status uses the unique
+    # tenant_id index.
+    "DROP INDEX IF EXISTS ix_tenant_auth_status",
+    # Composite read-path indexes (chat_id single-column index is superseded)
+    "DROP INDEX IF EXISTS ix_message_chat_id",
+    "CREATE INDEX IF NOT EXISTS ix_message_tenant_chat_date ON message (tenant_id, chat_id, date DESC)",
+    "CREATE INDEX IF NOT EXISTS ix_message_tenant_date ON message (tenant_id, date DESC)",
+    "CREATE INDEX IF NOT EXISTS ix_message_tenant_chat_msgid ON message (tenant_id, chat_id, message_id)",
+]
+
 
 def init_db() -> None:
     Base.metadata.create_all(bind=engine)
     # Ensure message table exists (Message model must be imported so it's in Base.metadata)
     Message.__table__.create(bind=engine, checkfirst=True)
-    # Add missing columns if they don't exist (for existing databases)
+    # Add missing columns if they don't exist (for existing databases).
+    # One catalog query up front, then all column ALTERs in a single transaction.
     try:
-        with engine.connect() as conn:
-            # Check if last_error column exists
-            result = conn.execute(
+        with engine.begin() as conn:
+            rows = conn.execute(
                 text("""
-                    SELECT column_name 
-                    FROM information_schema.columns 
-                    WHERE table_name='tenant_auth' AND column_name='last_error'
+                    SELECT table_name, column_name
+                    FROM information_schema.columns
+                    WHERE table_name IN ('tenant', 'tenant_auth', 'message')
                 """)
-            )
-            if result.fetchone() is None:
-                conn.execute(text("ALTER TABLE tenant_auth ADD COLUMN last_error TEXT"))
-                conn.commit()
-            
-            # Check if phone_code_hash column exists
-            result = conn.execute(
-                text("""
-                    SELECT column_name 
-                    FROM information_schema.columns 
-                    WHERE table_name='tenant_auth' AND column_name='phone_code_hash'
-                """)
-            )
-            if result.fetchone() is None:
-                conn.execute(text("ALTER TABLE tenant_auth ADD COLUMN phone_code_hash VARCHAR(128)"))
-                conn.commit()
+            ).all()
+            existing = {(t, c) for t, c in rows}
+            tables = {t for t, _ in existing}
+
+            if ("tenant", "callback_disabled_at") not in existing:
+                conn.execute(
+                    text("ALTER TABLE tenant ADD COLUMN callback_disabled_at TIMESTAMP WITH TIME ZONE")
+                )
+
             for col, spec in [
+                ("last_error", "TEXT"),
+                ("phone_code_hash", "VARCHAR(128)"),
                 ("code_requested_at", "TIMESTAMP WITH TIME ZONE"),
                 ("code_timeout_seconds", "INTEGER"),
             ]:
-                r = conn.execute(
-                    text(
-                        "SELECT 1 FROM information_schema.columns "
-                        "WHERE table_name='tenant_auth' AND column_name=:c"
-                    ),
-                    {"c": col},
-                )
-                if r.fetchone() is None:
+                if ("tenant_auth", col) not in existing:
                     conn.execute(text(f"ALTER TABLE tenant_auth ADD COLUMN {col} {spec}"))
-                    conn.commit()
-            
+
             # Message table migrations
-            # Check if message table exists
-            result = conn.execute(
-                text("""
-                    SELECT table_name 
-                    FROM information_schema.tables 
-                    WHERE table_name='message'
-                """)
-            )
-            if result.fetchone() is not None:
-                # Table exists, check for column migrations
-                
+            if "message" in tables:
                 # Rename address to chat_id if address exists and chat_id doesn't
-                result = conn.execute(
-                    text("""
-                        SELECT column_name 
-                        FROM information_schema.columns 
-                        WHERE table_name='message' AND column_name='address'
-                    """)
-                )
-                has_address = result.fetchone() is not None
-                
-                result = conn.execute(
-                    text("""
-                        SELECT column_name 
-                        FROM information_schema.columns 
-                        WHERE table_name='message' AND column_name='chat_id'
-                    """)
-                )
-                has_chat_id = result.fetchone() is not None
-                
-                if has_address and not has_chat_id:
+                if ("message", "address") in existing and ("message", "chat_id") not in existing:
                     conn.execute(text("ALTER TABLE message RENAME COLUMN address TO chat_id"))
-                    conn.commit()
-                
-                # Add phone_number column if it doesn't exist
-                result = conn.execute(
-                    text("""
-                        SELECT column_name 
-                        FROM information_schema.columns 
-                        WHERE table_name='message' AND column_name='phone_number'
-                    """)
-                )
-                if result.fetchone() is None:
-                    conn.execute(text("ALTER TABLE message ADD COLUMN phone_number VARCHAR(32)"))
-                    conn.commit()
-                
-                # Add username column if it doesn't exist
-                result = conn.execute(
-                    text("""
-                        SELECT column_name 
-                        FROM information_schema.columns 
-                        WHERE table_name='message' AND column_name='username'
-                    """)
-                )
-                if result.fetchone() is None:
-                    conn.execute(text("ALTER TABLE message ADD COLUMN username VARCHAR(255)"))
-                    conn.commit()
+                for col, spec in [
+                    ("phone_number", "VARCHAR(32)"),
+                    ("username", "VARCHAR(255)"),
+                ]:
+                    if ("message", col) not in existing:
+                        conn.execute(text(f"ALTER TABLE message ADD COLUMN {col} {spec}"))
     except Exception:
-        # Column might already exist or table doesn't exist yet - ignore
-        pass
+        logger.exception("init_db: column migrations failed and were rolled back")
+
+    for stmt in _INDEX_DDL:
+        try:
+            with engine.begin() as conn:
+                conn.execute(text(stmt))
+        except Exception:
+            logger.exception("init_db: index migration failed: %s", stmt)
 
 
 def get_session():
     with SessionLocal() as session:
         yield session
+
+
+async def get_async_session() -> AsyncIterator[AsyncSession]:
+    async with AsyncSessionLocal() as session:
+        yield session
@@ -2,7 +2,10 @@ import logging
 from contextlib import asynccontextmanager
 
 from dotenv import load_dotenv
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
+from fastapi.exception_handlers import request_validation_exception_handler
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 
 load_dotenv()
@@ -14,9 +17,17 @@ logging.basicConfig(
     datefmt="%Y-%m-%d %H:%M:%S",
 )
 
-from callback_dispatch import start_all_dispatchers, stop_all_dispatchers
+from callback_dispatch import (
+    close_http_client,
+    init_http_client,
+    start_all_dispatchers,
+    stop_all_dispatchers,
+)
 from config import DEV_CALLBACK_RECEIVER
-from database import init_db
+from database import async_engine, init_db
+from message_writer import start_message_writer, stop_message_writer
+from rate_limit_redis import close_redis, init_redis
+from telethon_manager import start_client_reaper, stop_client_reaper
 from routers import dev_callback_receiver, tenant_auth, tenant_callbacks, tenant_messages, tenants
 
 
@@ -24,22 +35,37 @@ from routers import dev_callback_receiver, tenant_auth, tenant_callbacks, tenant
 async def lifespan(app: FastAPI):
     try:
         init_db()
+        init_http_client()
+        init_redis()
+        start_client_reaper()
+        start_message_writer()
         await start_all_dispatchers()
     except Exception as e:
         import logging
         logger = logging.getLogger(__name__)
-        logger.error(f"Failed to initialize app: {e}", exc_info=True)
+        logger.error("Failed to initialize app: %s", e, exc_info=True)
         raise
     yield
     try:
         await stop_all_dispatchers()
+        await stop_client_reaper()
+        await stop_message_writer()
+        await close_http_client()
+        await close_redis()
+        await async_engine.dispose()
     except Exception as e:
         import logging
         logger = logging.getLogger(__name__)
-        logger.error(f"Error during shutdown: {e}", exc_info=True)
+        logger.error("Error during shutdown: %s", e, exc_info=True)
 
 
-app = FastAPI(title="Grey TG API", version="0.1.0", lifespan=lifespan)
+# orjson for every response body (response_model validation is unchanged).
+app = FastAPI(
+    title="Grey TG API",
+    version="0.1.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
 
 # CORS middleware - must be added FIRST, before routers
 # This ensures CORS headers are added to all responses, including errors
@@ -53,6 +79,22 @@ app.add_middleware(
     max_age=3600,
 )
 
+
+@app.exception_handler(RequestValidationError)
+async def invalid_phone_handler(request: Request, exc: RequestValidationError):
+    """
+    A phone rejected by the E.164 schema validator keeps the 400 invalid_phone shape
+    ({"error", "message"}) clients rely on; other validation errors stay FastAPI's 422.
+    """
+    for err in exc.errors():
+        if err.get("type") == "value_error" and tuple(err.get("loc", ())) == ("body", "phone"):
+            return ORJSONResponse(
+                status_code=400,
+                content={"detail": {"error": "invalid_phone", "message": str(err["ctx"]["error"])}},
+            )
+    return await request_validation_exception_handler(request, exc)
+
+
 app.include_router(tenants.router)
 app.include_router(tenant_auth.router)
 app.include_router(tenant_messages.router)
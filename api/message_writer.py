@@ -0,0 +1,101 @@
+"""
+Outbound message persistence: POST /messages/send enqueues the row for the `message`
+table and returns; a single background writer coalesces queued rows (up to
+OUTBOUND_BATCH_SIZE, or whatever arrives within OUTBOUND_FLUSH_INTERVAL_SEC of the
+first) into one multi-row INSERT and one commit, instead of a transaction per send.
+
+Rows still queued at shutdown are written before the writer exits. Rows are lost if the
+process dies before they are flushed; like the rest of message logging this is
+best-effort and never fails the send.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from typing import Any
+
+from sqlalchemy import insert
+
+from database import SessionLocal
+from models.message import Message
+
+logger = logging.getLogger(__name__)
+
+OUTBOUND_BATCH_SIZE = 200
+OUTBOUND_FLUSH_INTERVAL_SEC = 0.02
+
+# None is the shutdown sentinel: everything queued before it is still written.
+_queue: asyncio.Queue[dict[str, Any] | None] = asyncio.Queue()
+_writer_task: asyncio.Task[None] | None = None
+
+
+def enqueue_outbound(row: dict[str, Any]) -> None:
+    """Queue one `message` row (column -> value) for the writer. Never blocks."""
+    _queue.put_nowait(row)
+
+
+def _insert_messages(rows: list[dict[str, Any]], label: str) -> None:
+    """Insert message rows in one statement (own session, not tied to any request)."""
+    with SessionLocal() as db:
+        # executemany of a single INSERT: psycopg/SQLAlchemy send it as multi-row VALUES
+        db.execute(insert(Message), rows)
+        db.commit()
+    logger.info("Saved %s messages (%s)", len(rows), label)
+
+
+async def persist_messages(rows: list[dict[str, Any]], label: str) -> None:
+    """
+    Insert `message` rows (column -> value dicts) in one batch, off the event loop.
+    Shared by the outbound writer and the inbound dispatcher. Failures are logged, not
+    raised; `label` identifies the batch in log lines (e.g. "outbound").
+    """
+    if not rows:
+        return
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, _insert_messages, rows, label)
+    except Exception as e:
+        logger.exception("Failed to save %s messages (%s) error=%s", len(rows), label, e)
+
+
+async def _writer_loop() -> None:
+    loop = asyncio.get_running_loop()
+    while True:
+        first = await _queue.get()
+        if first is None:
+            return
+        rows = [first]
+        deadline = loop.time() + OUTBOUND_FLUSH_INTERVAL_SEC
+        stop = False
+        while len(rows) < OUTBOUND_BATCH_SIZE:
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                row = await asyncio.wait_for(_queue.get(), timeout)
+            except asyncio.TimeoutError:
+                break
+            if row is None:
+                stop = True
+                break
+            rows.append(row)
+        await persist_messages(rows, "outbound")
+        if stop:
+            return
+
+
+def start_message_writer() -> None:
+    """Start the background writer. Call from app lifespan."""
+    global _writer_task
+    if _writer_task is None:
+        _writer_task = asyncio.create_task(_writer_loop())
+
+
+async def stop_message_writer() -> None:
+    """Write out everything queued so far, then stop the writer (on shutdown)."""
+    global _writer_task
+    if _writer_task is None:
+        return
+    _queue.put_nowait(None)
+    await _writer_task
+    _writer_task = None
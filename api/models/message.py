@@ -1,7 +1,7 @@
 import uuid
 from datetime import datetime
 
-from sqlalchemy import BigInteger, DateTime, ForeignKey, String, Text, func
+from sqlalchemy import BigInteger, DateTime, ForeignKey, Index, String, Text, func, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import Mapped, mapped_column
 
@@ -12,6 +12,13 @@ class Message(Base):
     """Message table for storing incoming and outbound messages."""
 
     __tablename__ = "message"
+    __table_args__ = (
+        # "Latest messages for tenant (in chat)" reads: index order matches ORDER BY date DESC.
+        Index("ix_message_tenant_chat_date", "tenant_id", "chat_id", text("date DESC")),
+        Index("ix_message_tenant_date", "tenant_id", text("date DESC")),
+        # Point lookups of a specific Telegram message (dedup, status/read-receipt updates).
+        Index("ix_message_tenant_chat_msgid", "tenant_id", "chat_id", "message_id"),
+    )
 
     id: Mapped[uuid.UUID] = mapped_column(
         UUID(as_uuid=True),
@@ -24,7 +31,7 @@ class Message(Base):
         nullable=False,
         index=True,
     )
-    chat_id: Mapped[int] = mapped_column(BigInteger, nullable=False, index=True)
+    chat_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
     message_id: Mapped[int] = mapped_column(BigInteger, nullable=False)
     username: Mapped[str | None] = mapped_column(String(255), nullable=True)
     phone_number: Mapped[str | None] = mapped_column(String(32), nullable=True)
@@ -20,6 +20,7 @@ class Tenant(Base):
     )
     name: Mapped[str] = mapped_column(String(255), nullable=False)
     callback_url = mapped_column(String(2048), nullable=True)
+    callback_disabled_at = mapped_column(DateTime(timezone=True), nullable=True)  # set when callback_url returned 410 Gone
     created_at: Mapped[datetime] = mapped_column(
         DateTime(timezone=True),
         server_default=func.now(),
@@ -7,63 +7,140 @@ Resolve peer string (username, user_id, or phone) to an entity usable by client.
   allow_import_contact, import via contacts.ImportContactsRequest; if import returns
   no users -> PHONE_NOT_IN_CONTACTS_OR_NOT_ON_TELEGRAM. If allow_import_contact false
   and not in contacts -> PHONE_NOT_IN_CONTACTS.
+
+resolve_peers resolves a list of peers at once (multi-recipient sends), importing all
+unknown phones with one ImportContactsRequest per IMPORT_CONTACTS_BATCH_SIZE numbers.
 """
 
 from __future__ import annotations
 
+import asyncio
 import logging
-from typing import TYPE_CHECKING
+import random
+import re
+from collections.abc import Awaitable, Callable
+from typing import TYPE_CHECKING, TypeVar
 
+from cachetools import TTLCache
 from fastapi import HTTPException
 from telethon import errors as tg_errors
 from telethon.tl import functions, types
 from telethon.tl.types import User, Chat, Channel
 
+from schemas import MAX_PHONE_INPUT_LEN
+
 if TYPE_CHECKING:
     from telethon import TelegramClient
 
 logger = logging.getLogger(__name__)
 
+# Everything except ASCII digits and "+" (spaces, dashes, parentheses, letters...).
+_PHONE_STRIP_RE = re.compile(r"[^0-9+]+")
+
+# (tenant_id, peer.lower()) -> (entity, peer_resolved_display). Entities carry the
+# tenant account's access_hash, so the key must include the tenant.
+ENTITY_CACHE_MAXSIZE = 10_000
+ENTITY_CACHE_TTL_SEC = 300
+_entity_cache: TTLCache[tuple[str, str], tuple[User | Chat | Channel, str]] = TTLCache(
+    maxsize=ENTITY_CACHE_MAXSIZE, ttl=ENTITY_CACHE_TTL_SEC
+)
+# Single-flight: (tenant_id, peer.lower(), allow_import_contact) -> future of the resolution
+# currently running. The flag is part of the key: a lookup without import must not hand
+# its PHONE_NOT_IN_CONTACTS to a caller that allows importing. Event loop thread only.
+_inflight: dict[tuple[str, str, bool], asyncio.Future[tuple[User | Chat | Channel, str]]] = {}
+
+# Max concurrent resolve_peer lookups per resolve_peers call.
+RESOLVE_PEERS_CONCURRENCY = 8
+
+# Contacts per ImportContactsRequest in resolve_peers; Telegram caps how many one
+# request may carry, so larger sets are imported in chunks.
+IMPORT_CONTACTS_BATCH_SIZE = 500
+
+# FloodWaits up to this many seconds are slept out in-process (once) instead of
+# being returned to the client as 429.
+FLOOD_WAIT_RETRY_MAX_SEC = 5.0
+
+T = TypeVar("T")
+
+
+async def _with_backoff(
+    call: Callable[[], Awaitable[T]],
+    *,
+    max_retries: int = 1,
+    cap: float = FLOOD_WAIT_RETRY_MAX_SEC,
+) -> T:
+    """Await call(), retrying after short FloodWaits (<= cap seconds, +0-20% jitter). Other errors propagate."""
+    attempt = 0
+    while True:
+        try:
+            return await call()
+        except tg_errors.FloodWaitError as e:
+            if attempt >= max_retries or e.seconds > cap:
+                raise
+            attempt += 1
+            delay = e.seconds * (1 + random.random() * 0.2)
+            logger.info("FloodWait %ss, retrying in %.2fs (attempt %d)", e.seconds, delay, attempt)
+            await asyncio.sleep(delay)
+
+
+def _is_phone_number(s: str) -> bool:
+    """
+    Dispatch check: with separators dropped (only digits and "+" kept), does the peer start
+    with "+" and have at least 6 characters? So "+ 1 234 567 8900" and "(+1) 234..." count
+    as phones. Only the first MAX_PHONE_INPUT_LEN characters are looked at, so the check is
+    constant-time for any peer; validation (length cap first) is in _normalize_e164.
+    """
+    head = s[:MAX_PHONE_INPUT_LEN]
+    if "+" not in head:  # usernames, ids, "me": no regex at all
+        return False
+    head = _PHONE_STRIP_RE.sub("", head)
+    return len(head) >= 6 and head[0] == "+"
+
 
-def _normalize_e164(phone: str) -> tuple[str | None, str | None]:
-    """Normalize to E.164. Returns (normalized, None) or (None, error_message)."""
-    if not phone or not isinstance(phone, str):
-        return None, "Phone number is required."
-    s = phone.strip()
-    stripped = "".join(c for c in s if c.isdigit() or c == "+")
-    if not stripped.startswith("+"):
-        return None, "Phone must be in E.164 format: +<country><number> (e.g. +79001234567)."
-    digits = stripped[1:]
-    if not digits or not digits.isdigit():
+def _normalize_e164(s: str) -> tuple[str | None, str | None]:
+    """
+    Normalize a phone-like peer to strict E.164 (spaces/dashes/parentheses stripped).
+    Returns (normalized, None) or (None, error_message).
+    """
+    if len(s) > MAX_PHONE_INPUT_LEN:
+        return None, "Phone too long."
+    digits = _PHONE_STRIP_RE.sub("", s)[1:]
+    if not digits.isdigit():
         return None, "Phone must contain only + followed by digits (E.164)."
     if len(digits) < 10:
         return None, "Phone number too short for E.164."
     return "+" + digits, None
 
 
-def _is_phone_number(peer: str) -> bool:
+def _classify_peer(peer: str) -> tuple[str, str | None, str | None]:
+    """
+    Classify a peer string. Returns (kind, normalized, error):
+
+    - ("me", None, None) for "me"/"self";
+    - ("phone", "+<digits>", None) for a valid E.164 phone, or ("phone", None, message)
+      when it looks like a phone but is invalid;
+    - ("other", None, None) for anything else (username or numeric id).
+    """
     s = peer.strip()
-    stripped = "".join(c for c in s if c.isdigit() or c == "+")
-    return (
-        stripped.startswith("+")
-        and len(stripped) > 5
-        and all(c.isdigit() or c == "+" for c in stripped)
-    )
-
-
-def _format_peer_resolved(peer_input: str, entity: User | Chat | Channel) -> str:
-    if peer_input.strip().lower() in ("me", "self"):
-        return "me"
-    if _is_phone_number(peer_input):
-        normalized, _ = _normalize_e164(peer_input)
-        if normalized:
-            if isinstance(entity, User) and getattr(entity, "phone", None):
-                return entity.phone
-            return normalized
-    username = getattr(entity, "username", None)
-    if username:
-        return f"@{username}"
-    return str(entity.id)
+    if s.lower() in ("me", "self"):
+        return "me", None, None
+    if not _is_phone_number(s):
+        return "other", None, None
+    normalized, err = _normalize_e164(s)
+    return "phone", normalized, err
+
+
+def _format_phone_resolved(entity: User | Chat | Channel, normalized: str) -> str:
+    """Display string for a peer resolved from a phone: the account's phone, else the normalized input."""
+    if isinstance(entity, User) and entity.phone:
+        return entity.phone
+    return normalized
+
+
+def forget_tenant_entities(tenant_id: str) -> None:
+    """Drop cached entities for a tenant (e.g. on logout or when a different account signs in)."""
+    for key in [k for k in _entity_cache.keys() if k[0] == tenant_id]:
+        _entity_cache.pop(key, None)
 
 
 async def resolve_peer(
@@ -81,15 +158,56 @@ async def resolve_peer(
     - Phone: E.164 normalize; get_entity(phone) if in contacts; else ImportContacts
       when allow_import_contact, else raise PHONE_NOT_IN_CONTACTS.
 
+    Successful resolutions are cached per (tenant_id, peer) for ENTITY_CACHE_TTL_SEC
+    (only when tenant_id is given), so repeat sends skip the Telegram RPC. Concurrent
+    calls for the same uncached peer and allow_import_contact share one in-flight resolution.
+
     Raises HTTPException(400) for invalid peer, PHONE_NOT_IN_CONTACTS,
     PHONE_NOT_IN_CONTACTS_OR_NOT_ON_TELEGRAM; HTTPException(429) for FloodWait.
     """
-    t = tenant_id or "?"
     peer_stripped = peer.strip()
+    if tenant_id is None:
+        return await _resolve_peer_uncached(client, peer_stripped, allow_import_contact, "?")
+    key = (tenant_id, peer_stripped.lower())
+    cached = _entity_cache.get(key)
+    if cached is not None:
+        return cached
+    flight_key = (*key, allow_import_contact)
+    pending = _inflight.get(flight_key)
+    if pending is not None:
+        # Another request is already resolving this peer the same way: share its result (or error).
+        return await asyncio.shield(pending)
+    fut: asyncio.Future[tuple[User | Chat | Channel, str]] = asyncio.get_running_loop().create_future()
+    _inflight[flight_key] = fut
+    try:
+        resolved = await _resolve_peer_uncached(client, peer_stripped, allow_import_contact, tenant_id)
+    except asyncio.CancelledError:
+        fut.cancel()
+        raise
+    except BaseException as e:
+        # Failures (UsernameNotOccupied, PeerIdInvalid, ...) are never cached, so there is
+        # nothing to invalidate: the next call asks Telegram again.
+        fut.set_exception(e)
+        fut.exception()  # mark retrieved so an unshared failure doesn't log "never retrieved"
+        raise
+    else:
+        _entity_cache[key] = resolved
+        fut.set_result(resolved)
+        return resolved
+    finally:
+        del _inflight[flight_key]
+
+
+async def _resolve_peer_uncached(
+    client: "TelegramClient",
+    peer_stripped: str,
+    allow_import_contact: bool,
+    t: str,
+) -> tuple[User | Chat | Channel, str]:
+    kind, normalized, err = _classify_peer(peer_stripped)
 
     # --- Phone ---
-    if _is_phone_number(peer_stripped):
-        normalized, err = _normalize_e164(peer_stripped)
+    if kind == "phone":
         if err:
             logger.warning("resolve_peer: invalid phone format peer=%r tenant=%s", peer_stripped, t)
             raise HTTPException(
@@ -100,9 +218,9 @@ async def resolve_peer(
 
         # 1) Try existing contact
         try:
-            entity = await client.get_entity(normalized)
+            entity = await _with_backoff(lambda: client.get_entity(normalized))
             logger.info("resolve_peer: phone found in contacts phone=%s tenant=%s", normalized, t)
-            return entity, _format_peer_resolved(peer_stripped, entity)
+            return entity, _format_phone_resolved(entity, normalized)
         except ValueError as e:
             logger.debug("resolve_peer: phone not in contacts, trying import phone=%s tenant=%s %s", normalized, t, e)
             pass
@@ -115,6 +233,7 @@ async def resolve_peer(
                     "message": f"Telegram rate limit. Retry after {e.seconds} seconds.",
                     "retry_after_seconds": e.seconds,
                 },
+                headers={"Retry-After": str(e.seconds)},
             ) from e
 
         if not allow_import_contact:
@@ -136,7 +255,7 @@ async def resolve_peer(
             last_name="",
         )
         try:
-            result = await client(functions.contacts.ImportContactsRequest(contacts=[inp]))
+            result = await _with_backoff(lambda: client(functions.contacts.ImportContactsRequest(contacts=[inp])))
         except tg_errors.FloodWaitError as e:
             logger.warning("resolve_peer: FloodWait on ImportContacts tenant=%s seconds=%s", t, e.seconds)
             raise HTTPException(
@@ -146,6 +265,7 @@ async def resolve_peer(
                     "message": f"Telegram rate limit. Retry after {e.seconds} seconds.",
                     "retry_after_seconds": e.seconds,
                 },
+                headers={"Retry-After": str(e.seconds)},
             ) from e
 
         users = getattr(result, "users", None) or []
@@ -164,17 +284,18 @@ async def resolve_peer(
             )
         entity = users[0]
         logger.info("resolve_peer: contact imported for phone=%s user_id=%s tenant=%s", normalized, entity.id, t)
-        return entity, _format_peer_resolved(peer_stripped, entity)
+        return entity, _format_phone_resolved(entity, normalized)
 
     # --- "me" / "self" ---
-    if peer_stripped.lower() in ("me", "self"):
+    if kind == "me":
         entity = await client.get_me()
         return entity, "me"
 
     # --- Username or numeric ID ---
     try:
-        entity = await client.get_entity(peer_stripped)
-        return entity, _format_peer_resolved(peer_stripped, entity)
+        entity = await _with_backoff(lambda: client.get_entity(peer_stripped))
+        username = getattr(entity, "username", None)
+        return entity, f"@{username}" if username else str(entity.id)
     except tg_errors.UsernameNotOccupiedError:
         logger.warning("resolve_peer: username not occupied peer=%r tenant=%s", peer_stripped, t)
         raise HTTPException(
@@ -196,4 +317,93 @@ async def resolve_peer(
                 "message": f"Telegram rate limit. Retry after {e.seconds} seconds.",
                 "retry_after_seconds": e.seconds,
             },
+            headers={"Retry-After": str(e.seconds)},
         ) from e
+
+
+
+async def resolve_peers(
+    client: "TelegramClient",
+    peers: list[str],
+    *,
+    allow_import_contact: bool = True,
+    tenant_id: str | None = None,
+    concurrency: int = RESOLVE_PEERS_CONCURRENCY,
+) -> list[tuple[User | Chat | Channel, str] | HTTPException]:
+    """
+    Resolve several peers for one tenant. Returns one item per input, in order: either
+    (entity, peer_resolved_display) or the HTTPException resolve_peer would raise for it.
+
+    Contacts, usernames and ids are looked up concurrently (at most `concurrency` RPCs
+    outstanding; duplicate peers share one lookup via resolve_peer's single-flight map); phones not in contacts are imported
+    together, IMPORT_CONTACTS_BATCH_SIZE per ImportContactsRequest, instead of one RPC
+    per number.
+    """
+    t = tenant_id or "?"
+    sem = asyncio.Semaphore(concurrency)
+
+    async def lookup(peer: str) -> tuple[User | Chat | Channel, str] | HTTPException:
+        try:
+            async with sem:
+                return await resolve_peer(client, peer, allow_import_contact=False, tenant_id=tenant_id)
+        except HTTPException as e:
+            return e
+
+    results = list(await asyncio.gather(*(lookup(p) for p in peers)))
+    if not allow_import_contact:
+        return results
+
+    # Valid phones that are not in contacts: normalized phone -> indexes into peers.
+    missing: dict[str, list[int]] = {}
+    for i, r in enumerate(results):
+        if isinstance(r, HTTPException) and r.detail.get("error") == "PHONE_NOT_IN_CONTACTS":
+            _, normalized, _ = _classify_peer(peers[i])
+            missing.setdefault(normalized, []).append(i)
+
+    phones = list(missing)
+    for start in range(0, len(phones), IMPORT_CONTACTS_BATCH_SIZE):
+        chunk = phones[start:start + IMPORT_CONTACTS_BATCH_SIZE]
+        # client_id is the phone's position in `phones`: unique within the request.
+        contacts = [
+            types.InputPhoneContact(client_id=start + n, phone=phone, first_name="", last_name="")
+            for n, phone in enumerate(chunk)
+        ]
+        try:
+            result = await _with_backoff(lambda: client(functions.contacts.ImportContactsRequest(contacts=contacts)))
+        except tg_errors.FloodWaitError as e:
+            logger.warning("resolve_peers: FloodWait on ImportContacts tenant=%s seconds=%s", t, e.seconds)
+            exc = HTTPException(
+                status_code=429,
+                detail={
+                    "error": "flood_wait",
+                    "message": f"Telegram rate limit. Retry after {e.seconds} seconds.",
+                    "retry_after_seconds": e.seconds,
+                },
+                headers={"Retry-After": str(e.seconds)},
+            )
+            # This chunk and the ones not sent yet: another request now would hit the same wait.
+            for phone in phones[start:]:
+                for i in missing[phone]:
+                    results[i] = exc
+            return results
+
+        users = {u.id: u for u in result.users}
+        imported = {c.client_id: users.get(c.user_id) for c in result.imported}
+        logger.info("resolve_peers: imported %d/%d contacts tenant=%s", len(imported), len(chunk), t)
+        for n, phone in enumerate(chunk, start):
+            entity = imported.get(n)
+            if entity is None:
+                item: tuple[User | Chat | Channel, str] | HTTPException = HTTPException(
+                    status_code=400,
+                    detail={
+                        "error": "PHONE_NOT_IN_CONTACTS_OR_NOT_ON_TELEGRAM",
+                        "message": "Number not in contacts and not on Telegram (or has privacy restrictions). Import failed.",
+                    },
+                )
+            else:
+                item = (entity, _format_phone_resolved(entity, phone))
+            for i in missing[phone]:
+                results[i] = item
+                if tenant_id is not None and not isinstance(item, HTTPException):
+                    _entity_cache[(tenant_id, peers[i].strip().lower())] = item
+    return results
@@ -8,38 +8,64 @@ Per-tenant in-memory rate limiter for send-message and similar actions.
 - Protects against buggy retry loops or runaway clients.
 - Per-tenant isolation ensures one tenant cannot starve others.
 
-**MVP:** In-memory, sliding-window. Not shared across processes; suitable for single-instance
+**MVP:** In-memory token bucket (capacity RATE_LIMIT_REQUESTS, refilled continuously at
+RATE_LIMIT_REQUESTS per RATE_LIMIT_WINDOW_SEC). Per tenant it is just (tokens, last_refill),
+which also maps directly onto a Redis hash later. Not shared across processes; suitable for single-instance
 dev/small deployments. For production at scale, use Redis or similar for cross-worker limits.
 """
 
 from __future__ import annotations
 
 import time
-from collections import defaultdict
-from threading import Lock
 from uuid import UUID
 
-_lock = Lock()
-_store: dict[UUID, list[float]] = defaultdict(list)
-
 # 10 requests per 60 seconds per tenant
 RATE_LIMIT_REQUESTS = 10
 RATE_LIMIT_WINDOW_SEC = 60.0
 
+_RATE = RATE_LIMIT_REQUESTS / RATE_LIMIT_WINDOW_SEC  # tokens per second
+_CAPACITY = float(RATE_LIMIT_REQUESTS)
+
+# No lock: check_rate_limit is only called from async handlers on the event loop thread,
+# and the read-modify-write below never awaits, so it cannot interleave with another call.
+# If it is ever called from worker threads, reintroduce per-tenant locking.
+# Per-tenant (tokens, last_refill monotonic time), keyed by tenant_id.int (cheaper to hash
+# than the UUID object); absent = full bucket.
+_state: dict[int, tuple[float, float]] = {}
+
+# Every _SWEEP_INTERVAL_SEC, check_rate_limit drops buckets that have refilled to capacity
+# (equivalent to absent), so idle tenants do not accumulate in _state.
+_SWEEP_INTERVAL_SEC = 300.0
+_next_sweep = 0.0
+
+
+def _sweep(now: float) -> None:
+    """Drop entries whose bucket would be full by now."""
+    full = [k for k, (tokens, last) in _state.items() if tokens + (now - last) * _RATE >= _CAPACITY]
+    for k in full:
+        del _state[k]
+
 
 def check_rate_limit(tenant_id: UUID) -> tuple[bool, float | None]:
     """
     Returns (allowed, retry_after_seconds).
     If allowed is False, retry_after_seconds is the suggested wait (or None if unknown).
+    Must be called from the event loop thread (see note on _state).
     """
+    global _next_sweep
+    key = tenant_id.int
     now = time.monotonic()
-    cutoff = now - RATE_LIMIT_WINDOW_SEC
-    with _lock:
-        times = _store[tenant_id]
-        times[:] = [t for t in times if t > cutoff]
-        if len(times) >= RATE_LIMIT_REQUESTS:
-            oldest = min(times)
-            retry_after = max(0.0, RATE_LIMIT_WINDOW_SEC - (now - oldest))
-            return False, round(retry_after, 1)
-        times.append(now)
-    return True, None
+    if now >= _next_sweep:
+        _sweep(now)
+        _next_sweep = now + _SWEEP_INTERVAL_SEC
+    entry = _state.get(key)
+    if entry is None:
+        tokens = _CAPACITY
+    else:
+        tokens, last = entry
+        tokens = min(_CAPACITY, tokens + (now - last) * _RATE)
+    if tokens >= 1.0:
+        _state[key] = (tokens - 1.0, now)
+        return True, None
+    _state[key] = (tokens, now)
+    return False, round((1.0 - tokens) / _RATE, 1)
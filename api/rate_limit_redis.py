@@ -0,0 +1,90 @@
+"""
+Redis-backed per-tenant rate limiter, shared by all workers/instances.
+
+Enabled when REDIS_URL is set (requires the optional `redis` package); otherwise, and
+whenever Redis is unreachable, check_rate_limit_redis falls back to the in-memory token
+bucket in `rate_limit` so sends are never blocked by a Redis outage.
+
+Sliding window per tenant: a sorted set `rl:{tenant_id}` of request timestamps. One Lua
+script (one round-trip, atomic) drops entries older than the window, admits the request
+if fewer than `limit` remain, and otherwise returns the wait until the oldest one expires.
+Rejected requests are not recorded, so hammering during a 429 does not extend it.
+"""
+
+from __future__ import annotations
+
+import logging
+import time
+import uuid
+from typing import Any
+from uuid import UUID
+
+from config import REDIS_URL
+from rate_limit import RATE_LIMIT_REQUESTS, RATE_LIMIT_WINDOW_SEC, check_rate_limit
+
+logger = logging.getLogger(__name__)
+
+# KEYS[1] = key; ARGV = now_ms, window_ms, limit, member
+# Returns {1, 0} when allowed, {0, retry_after_ms} when limited.
+_SLIDING_WINDOW_LUA = """
+local key = KEYS[1]
+local now = tonumber(ARGV[1])
+local window = tonumber(ARGV[2])
+redis.call('ZREMRANGEBYSCORE', key, '-inf', now - window)
+if redis.call('ZCARD', key) < tonumber(ARGV[3]) then
+  redis.call('ZADD', key, now, ARGV[4])
+  redis.call('PEXPIRE', key, window)
+  return {1, 0}
+end
+local oldest = redis.call('ZRANGE', key, 0, 0, 'WITHSCORES')
+return {0, tonumber(oldest[2]) + window - now}
+"""
+
+_redis: Any = None  # redis.asyncio.Redis when REDIS_URL is set
+_script: Any = None
+
+
+def init_redis() -> None:
+    """Connect the Redis pool if REDIS_URL is set (call on app startup)."""
+    global _redis, _script
+    if not REDIS_URL or _redis is not None:
+        return
+    import redis.asyncio as aioredis
+
+    _redis = aioredis.from_url(REDIS_URL)
+    _script = _redis.register_script(_SLIDING_WINDOW_LUA)
+    logger.info("Rate limiting via Redis")
+
+
+async def close_redis() -> None:
+    """Close the Redis pool (call on app shutdown)."""
+    global _redis, _script
+    if _redis is not None:
+        await _redis.aclose()
+        _redis = None
+        _script = None
+
+
+async def check_rate_limit_redis(
+    tenant_id: UUID,
+    limit: int = RATE_LIMIT_REQUESTS,
+    window_sec: float = RATE_LIMIT_WINDOW_SEC,
+) -> tuple[bool, float | None]:
+    """
+    Same contract as rate_limit.check_rate_limit: (allowed, retry_after_seconds).
+    Uses Redis when configured, else (or on Redis errors) the in-memory limiter.
+    """
+    if _script is None:
+        return check_rate_limit(tenant_id)
+    window_ms = int(window_sec * 1000)
+    try:
+        allowed, retry_ms = await _script(
+            keys=[f"rl:{tenant_id}"],
+            args=[int(time.time() * 1000), window_ms, limit, uuid.uuid4().hex],
+        )
+    except Exception as e:
+        logger.warning("Redis rate limit failed, using in-memory limiter: %s", e)
+        return check_rate_limit(tenant_id)
+    if allowed:
+        return True, None
+    return False, round(max(int(retry_ms), 0) / 1000, 1)
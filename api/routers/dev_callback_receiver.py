@@ -10,36 +10,46 @@ Not mounted when DEV_CALLBACK_RECEIVER is unset (production).
 
 from __future__ import annotations
 
-import json
+import time
 from collections import deque
 from datetime import datetime, timezone
 from typing import Any
 
+import orjson
 from fastapi import APIRouter, Request
+from fastapi.responses import ORJSONResponse
 
 MAX_PAYLOADS = 100
-_store: deque[dict[str, Any]] = deque(maxlen=MAX_PAYLOADS)
+# (received_at unix time, raw body); formatted and parsed only on GET.
+_store: deque[tuple[float, bytes]] = deque(maxlen=MAX_PAYLOADS)
 
 router = APIRouter(prefix="/dev/callback-receiver", tags=["dev"])
 
 
+def _parse(raw: bytes) -> Any:
+    try:
+        return orjson.loads(raw) if raw else {}
+    except orjson.JSONDecodeError:
+        return {"_raw": raw.decode("utf-8", errors="replace")}
+
+
 @router.post("")
 async def post_callback(request: Request) -> dict[str, str]:
-    """Store request body (JSON) in memory. Returns 200."""
+    """Store raw request body in memory (parsed lazily on GET). Returns 200."""
     raw = await request.body()
-    try:
-        payload = json.loads(raw) if raw else {}
-    except json.JSONDecodeError:
-        payload = {"_raw": raw.decode("utf-8", errors="replace")}
-    entry = {
-        "received_at": datetime.now(timezone.utc).isoformat(),
-        "payload": payload,
-    }
-    _store.append(entry)
+    _store.append((time.time(), raw))
     return {"ok": "stored"}
 
 
-@router.get("")
+@router.get("", response_class=ORJSONResponse)
 def get_callback_payloads() -> list[dict[str, Any]]:
     """Return recent stored payloads (newest first)."""
-    return list(reversed(_store))
+    # Runs in the threadpool while POST appends on the event loop: copy first (list() of a
+    # deque is a single C call), then parse the snapshot, never the live deque.
+    entries = list(_store)
+    out = [
+        {"received_at": datetime.fromtimestamp(ts, timezone.utc).isoformat(), "payload": _parse(raw)}
+        for ts, raw in entries
+    ]
+    out.reverse()
+    return out
@@ -11,23 +11,31 @@ Tenant-scoped Telegram auth endpoints.
 """
 
 import asyncio
+import hashlib
 import logging
+import math
+import time
 from datetime import datetime, timezone
+from typing import NamedTuple
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from cachetools import TTLCache
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from sqlalchemy import bindparam, func, lambda_stmt, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from telethon import errors as tg_errors
 from telethon.tl import functions, types
 
 logger = logging.getLogger(__name__)
 
 from callback_dispatch import start_dispatcher, stop_dispatcher
-from database import get_session
+from database import get_async_session
 from models.tenant import Tenant
 from models.tenant_auth import TenantAuth
+from peer_resolver import forget_tenant_entities
 from schemas import (
+    PHONE_JUNK_RE,
     AuthStartRequest,
     AuthStartResponse,
     AuthVerifyRequest,
@@ -36,7 +44,7 @@ from schemas import (
     LogoutResponse,
     TenantStatusResponse,
 )
-from telethon_manager import build_client, clear_session, save_session, set_last_error
+from telethon_manager import acquire_client, clear_session, save_session, set_last_error
 
 router = APIRouter(
     prefix="/tenants/{tenant_id}",
@@ -45,56 +53,214 @@ router = APIRouter(
 )
 
 
-def _normalize_e164(phone: str) -> tuple[str | None, str | None]:
+class CachedTenant(NamedTuple):
+    """Detached snapshot of the Tenant columns the auth flow needs (safe to share across sessions)."""
+
+    id: UUID
+    callback_url: str | None
+    callback_disabled: bool  # Tenant.callback_disabled_at is set (callback_url answered 410 Gone)
+
+
+# Tenant rows are effectively immutable for the auth flow; a short TTL bounds staleness
+# for out-of-band edits (e.g. callback_url changed directly in the DB). In-app edits call
+# forget_cached_tenant.
+TENANT_CACHE_TTL_SEC = 30
+_tenant_cache: TTLCache[UUID, CachedTenant] = TTLCache(maxsize=4096, ttl=TENANT_CACHE_TTL_SEC)
+
+
+def forget_cached_tenant(tenant_id: UUID) -> None:
+    """Drop the cached Tenant snapshot (after callback_url or callback_disabled_at changes)."""
+    _tenant_cache.pop(tenant_id, None)
+
+
+# Strong refs to fire-and-forget tasks so they are not garbage-collected mid-flight.
+_bg_tasks: set[asyncio.Task[None]] = set()
+
+
+def _log_bg_failure(task: asyncio.Task[None]) -> None:
+    _bg_tasks.discard(task)
+    if not task.cancelled() and task.exception() is not None:
+        logger.error("Dispatcher start failed: %s", task.exception())
+
+
+def _start_dispatcher_soon(tenant: CachedTenant) -> None:
     """
-    Normalize phone to strict E.164 (+<country><number>).
-    Reject if missing + or contains invalid chars (spaces/dashes allowed but stripped).
-    Returns (normalized, None) or (None, error_message).
+    Start the inbound dispatcher without holding up the auth response. A callback
+    disabled by a 410 stays disabled: the dispatcher only stores inbound messages.
     """
-    if not phone or not isinstance(phone, str):
-        return None, "Phone number is required."
-    s = phone.strip()
-    # Strip spaces, dashes, parentheses for validation
-    stripped = "".join(c for c in s if c.isdigit() or c == "+")
-    if not stripped.startswith("+"):
-        return None, "Phone must be in E.164 format: +<country><number> (e.g. +79001234567)."
-    digits = stripped[1:]
-    if not digits or not digits.isdigit():
-        return None, "Phone must contain only + followed by digits (E.164)."
-    if len(digits) < 10:
-        return None, "Phone number too short for E.164."
-    return "+" + digits, None
-
-
-def _tenant_or_404(tenant_id: UUID, db: Session) -> Tenant:
-    tenant = db.execute(select(Tenant).where(Tenant.id == tenant_id)).scalars().first()
-    if not tenant:
+    assert tenant.callback_url
+    task = asyncio.create_task(
+        start_dispatcher(tenant.id, tenant.callback_url, callback_disabled=tenant.callback_disabled)
+    )
+    _bg_tasks.add(task)
+    task.add_done_callback(_log_bg_failure)
+
+
+# Hot lookups as lambda statements: built and cache-keyed once, not on every call.
+_TENANT_STMT = lambda_stmt(
+    lambda: select(Tenant.id, Tenant.callback_url, Tenant.callback_disabled_at).where(
+        Tenant.id == bindparam("tenant_id")
+    )
+)
+
+
+async def _tenant_or_404(tenant_id: UUID, db: AsyncSession) -> CachedTenant:
+    cached = _tenant_cache.get(tenant_id)
+    if cached is not None:
+        return cached
+    row = (await db.execute(_TENANT_STMT, {"tenant_id": tenant_id})).first()
+    if not row:
         raise HTTPException(
             status_code=404,
             detail={"error": "not_found", "message": "Tenant not found."},
         )
+    tenant = CachedTenant(row.id, row.callback_url, row.callback_disabled_at is not None)
+    _tenant_cache[tenant_id] = tenant
     return tenant
 
 
+async def _load_tenant_and_auth(
+    tenant_id: UUID, db: AsyncSession
+) -> tuple[CachedTenant, TenantAuth | None]:
+    """
+    Tenant (404 if missing) and its TenantAuth row in one round trip: a TenantAuth
+    SELECT when the tenant is cached, else Tenant OUTER JOIN TenantAuth.
+    """
+    tenant = _tenant_cache.get(tenant_id)
+    if tenant is not None:
+        auth = (
+            await db.execute(select(TenantAuth).where(TenantAuth.tenant_id == tenant_id))
+        ).scalar_one_or_none()
+        return tenant, auth
+    row = (
+        await db.execute(
+            select(Tenant.id, Tenant.callback_url, Tenant.callback_disabled_at, TenantAuth)
+            .outerjoin(TenantAuth, TenantAuth.tenant_id == Tenant.id)
+            .where(Tenant.id == tenant_id)
+        )
+    ).first()
+    if not row:
+        raise HTTPException(
+            status_code=404,
+            detail={"error": "not_found", "message": "Tenant not found."},
+        )
+    tenant = CachedTenant(row.id, row.callback_url, row.callback_disabled_at is not None)
+    _tenant_cache[tenant_id] = tenant
+    return tenant, row.TenantAuth
+
+
 def _normalize_phone_for_compare(phone: str) -> str:
     """E.164-normalize for comparison only; no validation."""
-    s = "".join(c for c in (phone or "") if c.isdigit() or c == "+")
+    s = PHONE_JUNK_RE.sub("", phone or "")
     return s if s.startswith("+") else "+" + s if s.isdigit() else ""
 
 
 def _mask_hash(h: str | None) -> str:
-    if not h or len(h) < 8:
-        return "***"
-    return f"{h[:4]}...{h[-4:]}"
+    return f"{h[:4]}...{h[-4:]}" if h and len(h) >= 8 else "***"
+
+
+# Columns GET /status needs (row found via the unique tenant_id index).
+_STATUS_STMT = lambda_stmt(
+    lambda: select(
+        TenantAuth.authorized,
+        TenantAuth.phone,
+        TenantAuth.last_error,
+        TenantAuth.code_requested_at,
+        TenantAuth.code_timeout_seconds,
+    ).where(TenantAuth.tenant_id == bindparam("tenant_id"))
+)
 
 
-def _cooldown_seconds(auth: TenantAuth) -> int:
+def _cooldown_seconds(auth) -> int:
     """Seconds until resend allowed; 0 if no cooldown."""
     if not auth.code_requested_at or not auth.code_timeout_seconds:
         return 0
-    end = auth.code_requested_at.timestamp() + auth.code_timeout_seconds
-    now = datetime.now(timezone.utc).timestamp()
-    return max(0, int(end - now))
+    return max(0, int(auth.code_requested_at.timestamp() + auth.code_timeout_seconds - time.time()))
+
+
+# Per-tenant resend cooldown deadline (time.monotonic()), so resend attempts during the
+# cooldown get a 429 without touching the DB. Set whenever a code request is recorded;
+# a miss (or another worker) falls through to the DB check in auth_resend.
+_resend_deadline: dict[UUID, float] = {}
+
+
+def _resend_cooldown_gate(tenant_id: UUID) -> None:
+    """Dependency for /auth/resend: 429 from the in-process deadline before any SQL."""
+    deadline = _resend_deadline.get(tenant_id)
+    if deadline is None:
+        return
+    cd = math.ceil(deadline - time.monotonic())
+    if cd <= 0:
+        _resend_deadline.pop(tenant_id, None)
+        return
+    raise HTTPException(
+        status_code=429,
+        detail={
+            "error": "cooldown",
+            "message": f"Wait {cd} seconds before resending.",
+            "retry_after_seconds": cd,
+        },
+        headers={"Retry-After": str(cd)},
+    )
+
+
+async def _record_code_request(
+    db: AsyncSession,
+    tenant_id: UUID,
+    phone_code_hash: str,
+    timeout_seconds: int,
+    phone: str | None = None,
+) -> None:
+    """
+    Store phone_code_hash and resend cooldown (and phone, on /auth/start) in one
+    INSERT ... ON CONFLICT (tenant_id) DO UPDATE, then commit.
+    """
+    values = {
+        "phone_code_hash": phone_code_hash,
+        "code_requested_at": datetime.now(timezone.utc),
+        "code_timeout_seconds": timeout_seconds or 0,
+    }
+    if phone is not None:
+        values["phone"] = phone
+    stmt = pg_insert(TenantAuth).values(tenant_id=tenant_id, **values)
+    # ON CONFLICT bypasses the ORM onupdate hook, so bump updated_at explicitly.
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[TenantAuth.tenant_id],
+        set_={**values, "updated_at": func.now()},
+    )
+    await db.execute(stmt)
+    await db.commit()
+    if timeout_seconds:
+        _resend_deadline[tenant_id] = time.monotonic() + timeout_seconds
+    else:
+        _resend_deadline.pop(tenant_id, None)
+
+
+_HINT_APP = (
+    "Check Telegram app (Saved Messages / Telegram login message). "
+    "App notification requires Telegram logged in on another device and online."
+)
+_HINT_SMS = "Check your phone SMS messages for the login code."
+_HINT_CALL = "Answer the incoming phone call to get the code."
+_UNKNOWN_DELIVERY = ("unknown", "Check your Telegram app or phone messages for the login code.")
+
+# SentCode.type class -> (delivery, hint). Built by name so types missing from older
+# Telethon layers are simply skipped (and fall back to _UNKNOWN_DELIVERY).
+_SENT_CODE_MAP: dict[type, tuple[str, str]] = {
+    cls: value
+    for name, value in (
+        ("SentCodeTypeApp", ("telegram_app", _HINT_APP)),
+        ("SentCodeTypeSms", ("sms", _HINT_SMS)),
+        ("SentCodeTypeSmsWord", ("sms", _HINT_SMS)),
+        ("SentCodeTypeSmsPhrase", ("sms", _HINT_SMS)),
+        ("SentCodeTypeFirebaseSms", ("sms", _HINT_SMS)),
+        ("SentCodeTypeFragmentSms", ("sms", _HINT_SMS)),
+        ("SentCodeTypeCall", ("call", _HINT_CALL)),
+        ("SentCodeTypeFlashCall", ("call", _HINT_CALL)),
+        ("SentCodeTypeMissedCall", ("call", _HINT_CALL)),
+    )
+    if (cls := getattr(types.auth, name, None)) is not None
+}
 
 
 def _sent_code_diagnostics(
@@ -105,63 +271,112 @@ def _sent_code_diagnostics(
     delivery: "telegram_app" | "sms" | "call" | "unknown"
     """
     t = getattr(result, "type", None)
-    next_t = getattr(result, "next_type", None)
     timeout = getattr(result, "timeout", None)
     timeout = int(timeout) if timeout is not None else 0
-    h = getattr(result, "phone_code_hash", "") or ""
-    type_name = type(t).__name__ if t else "unknown"
-    next_name = type(next_t).__name__ if next_t else "none"
-    logger.info(
-        "Tenant %s: SentCode diagnostics type=%s next_type=%s timeout=%s phone_code_hash=%s",
-        tenant_id,
-        type_name,
-        next_name,
-        timeout,
-        _mask_hash(h),
-    )
-    delivery = "unknown"
-    if t:
-        n = type_name.lower()
-        if "app" in n:
-            delivery = "telegram_app"
-        elif "sms" in n or "sms" in type_name:
-            delivery = "sms"
-        elif "call" in n:
-            delivery = "call"
-    if delivery == "telegram_app":
-        hint = "Check Telegram app (Saved Messages / Telegram login message). App notification requires Telegram logged in on another device and online."
-    elif delivery == "sms":
-        hint = "Check your phone SMS messages for the login code."
-    elif delivery == "call":
-        hint = "Answer the incoming phone call to get the code."
-    else:
-        hint = "Check your Telegram app or phone messages for the login code."
+    if logger.isEnabledFor(logging.INFO):
+        next_t = getattr(result, "next_type", None)
+        logger.info(
+            "Tenant %s: SentCode diagnostics type=%s next_type=%s timeout=%s phone_code_hash=%s",
+            tenant_id,
+            type(t).__name__ if t else "unknown",
+            type(next_t).__name__ if next_t else "none",
+            timeout,
+            _mask_hash(getattr(result, "phone_code_hash", "") or ""),
+        )
+    delivery, hint = _SENT_CODE_MAP.get(type(t), _UNKNOWN_DELIVERY)
     return delivery, timeout, hint
 
 
+# sign_in error type -> (error code, last_error, message). These clear phone_code_hash.
+_SIGN_IN_ERRORS: dict[type[Exception], tuple[str, str, str]] = {
+    tg_errors.PhoneCodeInvalidError: (
+        "invalid_code",
+        "Invalid code",
+        "Invalid OTP code. Please check the code and try again.",
+    ),
+    tg_errors.PhoneCodeExpiredError: (
+        "code_expired",
+        "Code expired",
+        "OTP code has expired. Telegram may expire codes immediately if they detect automated usage. "
+        "Please request a new code by clicking 'Start OTP' again and enter it immediately after "
+        "receiving it in your Telegram app.",
+    ),
+}
+
+
+async def _sign_in_error(
+    tenant_id: UUID, auth: TenantAuth, e: Exception, db: AsyncSession
+) -> HTTPException:
+    """
+    Record a failed sign_in (last_error; phone_code_hash cleared unless FloodWait) and
+    return the HTTPException to raise. Known errors are a single dict lookup.
+    """
+    mapped = _SIGN_IN_ERRORS.get(type(e))
+    if mapped is not None:
+        code, last_error, message = mapped
+        logger.warning("Tenant %s: %s - %s", tenant_id, type(e).__name__, e)
+        auth.phone_code_hash = None  # committed by set_last_error
+        await set_last_error(tenant_id, last_error, db)
+        return HTTPException(status_code=400, detail={"error": code, "message": message})
+    if isinstance(e, tg_errors.FloodWaitError):
+        await set_last_error(tenant_id, f"Flood wait: retry after {e.seconds} seconds", db)
+        return HTTPException(
+            status_code=429,
+            detail={
+                "error": "flood_wait",
+                "message": f"Too many attempts. Retry after {e.seconds} seconds.",
+                "retry_after_seconds": e.seconds,
+            },
+            headers={"Retry-After": str(e.seconds)},
+        )
+    logger.error("Tenant %s: Unexpected error during sign_in: %s: %s", tenant_id, type(e).__name__, e, exc_info=e)
+    auth.phone_code_hash = None  # committed by set_last_error
+    msg = str(e) or type(e).__name__
+    await set_last_error(tenant_id, msg, db)
+    # Check if it's actually a code-related error wrapped in a generic exception
+    error_msg = msg
+    lowered = msg.lower()
+    if "expire" in lowered:
+        error_msg = "OTP code has expired. Request a new one via /auth/start."
+    elif "invalid" in lowered and "code" in lowered:
+        error_msg = "Invalid OTP code. Please check the code and try again."
+    return HTTPException(status_code=400, detail={"error": "sign_in_failed", "message": error_msg})
+
+
 @router.get(
     "/status",
     response_model=TenantStatusResponse,
     summary="Tenant auth status",
     description="Returns authorized, phone, last_error, and cooldown_seconds until resend allowed. Tenant-isolated.",
 )
-def get_status(
+async def get_status(
     tenant_id: UUID,
-    db: Session = Depends(get_session),
-) -> TenantStatusResponse:
-    _tenant_or_404(tenant_id, db)
-    row = (
-        db.execute(select(TenantAuth).where(TenantAuth.tenant_id == tenant_id))
-        .scalars()
-        .first()
-    )
-    if not row:
-        return TenantStatusResponse(authorized=False, phone=None, last_error=None, cooldown_seconds=0)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_async_session),
+) -> TenantStatusResponse | Response:
+    """
+    Sends an ETag over the response fields (cooldown included, since it changes without a
+    row update); a matching If-None-Match gets 304 so UI polling skips the body.
+    """
+    await _tenant_or_404(tenant_id, db)
+    row = (await db.execute(_STATUS_STMT, {"tenant_id": tenant_id})).first()
+    if row:
+        fields = (bool(row.authorized), row.phone, row.last_error, _cooldown_seconds(row))
+    else:
+        fields = (False, None, None, 0)
+    etag = '"%s"' % hashlib.blake2b(repr((str(tenant_id), *fields)).encode(), digest_size=8).hexdigest()
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in (t.strip() for t in if_none_match.split(","))):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    authorized, phone, last_error, cooldown = fields
     return TenantStatusResponse(
-        authorized=bool(row.authorized),
-        phone=row.phone,
-        last_error=row.last_error,
-        cooldown_seconds=_cooldown_seconds(row),
+        authorized=authorized,
+        phone=phone,
+        last_error=last_error,
+        cooldown_seconds=cooldown,
     )
 
 
@@ -179,28 +394,20 @@ def get_status(
 async def auth_start(
     tenant_id: UUID,
     body: AuthStartRequest,
-    db: Session = Depends(get_session),
+    db: AsyncSession = Depends(get_async_session),
 ) -> AuthStartResponse:
     """
     Auth state: IDLE -> WAIT_CODE
     Sends OTP via Telegram. Returns delivery, timeout_seconds, hint for UI.
     """
-    _tenant_or_404(tenant_id, db)
-    normalized_phone, err = _normalize_e164(body.phone)
-    if err:
-        raise HTTPException(
-            status_code=400,
-            detail={"error": "invalid_phone", "message": err},
-        )
-    assert normalized_phone is not None
+    await _tenant_or_404(tenant_id, db)
+    normalized_phone = body.phone  # E.164, normalized by the schema
 
-    client = build_client(tenant_id, db)
-    try:
-        await client.connect()
+    async with acquire_client(tenant_id, db) as client:
         try:
             result = await client.send_code_request(normalized_phone)
         except tg_errors.FloodWaitError as e:
-            set_last_error(tenant_id, f"Flood wait: retry after {e.seconds} seconds", db)
+            await set_last_error(tenant_id, f"Flood wait: retry after {e.seconds} seconds", db)
             raise HTTPException(
                 status_code=429,
                 detail={
@@ -208,21 +415,22 @@ async def auth_start(
                     "message": f"Too many attempts. Retry after {e.seconds} seconds.",
                     "retry_after_seconds": e.seconds,
                 },
+                headers={"Retry-After": str(e.seconds)},
             ) from e
         except tg_errors.PhoneNumberInvalidError:
-            set_last_error(tenant_id, "Invalid phone number", db)
+            await set_last_error(tenant_id, "Invalid phone number", db)
             raise HTTPException(
                 status_code=400,
                 detail={"error": "invalid_phone", "message": "Invalid phone number."},
             ) from None
         except tg_errors.PhoneNumberBannedError:
-            set_last_error(tenant_id, "Phone number banned", db)
+            await set_last_error(tenant_id, "Phone number banned", db)
             raise HTTPException(
                 status_code=400,
                 detail={"error": "phone_banned", "message": "This phone number is banned by Telegram."},
             ) from None
         except tg_errors.PhoneNumberFloodError:
-            set_last_error(tenant_id, "Phone number flood", db)
+            await set_last_error(tenant_id, "Phone number flood", db)
             raise HTTPException(
                 status_code=429,
                 detail={
@@ -230,15 +438,16 @@ async def auth_start(
                     "message": "Too many attempts for this phone. Wait before retrying.",
                     "retry_after_seconds": 60,
                 },
+                headers={"Retry-After": str(60)},
             ) from None
         except tg_errors.AuthRestartError:
-            set_last_error(tenant_id, "Auth restart", db)
+            await set_last_error(tenant_id, "Auth restart", db)
             raise HTTPException(
                 status_code=400,
                 detail={"error": "auth_restart", "message": "Auth was restarted. Try again."},
             ) from None
         except tg_errors.SendCodeUnavailableError:
-            set_last_error(tenant_id, "Send code unavailable", db)
+            await set_last_error(tenant_id, "Send code unavailable", db)
             raise HTTPException(
                 status_code=400,
                 detail={
@@ -248,7 +457,7 @@ async def auth_start(
             ) from None
         except Exception as e:
             msg = str(e) or type(e).__name__
-            set_last_error(tenant_id, msg, db)
+            await set_last_error(tenant_id, msg, db)
             raise HTTPException(
                 status_code=400,
                 detail={"error": "send_code_failed", "message": msg},
@@ -256,7 +465,7 @@ async def auth_start(
 
         # SentCodeSuccess = already logged in; unexpected here
         if isinstance(result, types.auth.SentCodeSuccess):
-            set_last_error(tenant_id, "Already logged in", db)
+            await set_last_error(tenant_id, "Already logged in", db)
             raise HTTPException(
                 status_code=400,
                 detail={"error": "already_logged_in", "message": "Session already authorized."},
@@ -265,19 +474,8 @@ async def auth_start(
         delivery, timeout_seconds, hint = _sent_code_diagnostics(result, tenant_id)
 
         await save_session(tenant_id, client, db, authorized=False)
-        auth = (
-            db.execute(select(TenantAuth).where(TenantAuth.tenant_id == tenant_id)).scalars().first()
-        )
-        if not auth:
-            auth = TenantAuth(tenant_id=tenant_id)
-            db.add(auth)
-        auth.phone_code_hash = result.phone_code_hash
-        auth.phone = normalized_phone
-        auth.code_requested_at = datetime.now(timezone.utc)
-        auth.code_timeout_seconds = timeout_seconds or 0
-        db.commit()
-
-        await asyncio.sleep(1.0)
+        await _record_code_request(db, tenant_id, result.phone_code_hash, timeout_seconds, phone=normalized_phone)
+
         return AuthStartResponse(
             ok=True,
             message="Code sent. Use POST /auth/verify with code.",
@@ -285,8 +483,6 @@ async def auth_start(
             timeout_seconds=timeout_seconds or 0,
             hint=hint,
         )
-    finally:
-        await client.disconnect()
 
 
 @router.post(
@@ -304,7 +500,7 @@ async def auth_start(
 async def auth_verify(
     tenant_id: UUID,
     body: AuthVerifyRequest,
-    db: Session = Depends(get_session),
+    db: AsyncSession = Depends(get_async_session),
 ) -> AuthVerifyResponse:
     """
     Auth state: WAIT_CODE -> (WAIT_2FA | READY)
@@ -312,16 +508,17 @@ async def auth_verify(
     Reuses the SAME TelegramClient session from auth_start (which contains phone_code_hash).
     After successful sign-in, saves the fully authorized session.
     """
-    tenant = _tenant_or_404(tenant_id, db)
-    normalized_phone, err = _normalize_e164(body.phone)
-    if err:
-        raise HTTPException(status_code=400, detail={"error": "invalid_phone", "message": err})
-    assert normalized_phone is not None
+    tenant, auth = await _load_tenant_and_auth(tenant_id, db)
+    normalized_phone = body.phone  # E.164, normalized by the schema
 
     # Check that we have a session with phone_code_hash
-    auth = db.execute(select(TenantAuth).where(TenantAuth.tenant_id == tenant_id)).scalars().first()
     if not auth or not auth.session_string:
-        logger.warning(f"Tenant {tenant_id}: No session found (auth exists: {auth is not None}, session exists: {auth.session_string if auth else None})")
+        logger.warning(
+            "Tenant %s: No session found (auth exists: %s, session exists: %s)",
+            tenant_id,
+            auth is not None,
+            bool(auth and auth.session_string),
+        )
         raise HTTPException(
             status_code=400,
             detail={
@@ -342,29 +539,35 @@ async def auth_verify(
             },
         )
     
-    logger.info(f"Tenant {tenant_id}: Verifying code for phone {normalized_phone} (state: WAIT_CODE -> WAIT_2FA/READY)")
+    logger.info("Tenant %s: Verifying code for phone %s (state: WAIT_CODE -> WAIT_2FA/READY)", tenant_id, normalized_phone)
     
     # CRITICAL: Reuse the SAME session from auth_start
     # This session contains the phone_code_hash internally from send_code_request()
-    client = build_client(tenant_id, db)
-    try:
-        await client.connect()
+    async with acquire_client(tenant_id, db) as client:
         try:
             # Get phone_code_hash from DB as backup, but the session should already have it
             phone_code_hash = auth.phone_code_hash
             if not phone_code_hash:
-                logger.warning(f"Tenant {tenant_id}: phone_code_hash not in DB, relying on session state")
+                logger.warning("Tenant %s: phone_code_hash not in DB, relying on session state", tenant_id)
             
-            logger.debug(f"Tenant {tenant_id}: Calling sign_in with phone={normalized_phone}, code={body.code[:2]}**, hash={phone_code_hash[:10] if phone_code_hash else 'from_session'}...")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "Tenant %s: Calling sign_in with phone=%s, code=%s**, hash=%s...",
+                    tenant_id,
+                    normalized_phone,
+                    body.code[:2],
+                    phone_code_hash[:10] if phone_code_hash else "from_session",
+                )
             await client.sign_in(normalized_phone, code=body.code, phone_code_hash=phone_code_hash)
         except tg_errors.SessionPasswordNeededError:
             # State: WAIT_CODE -> WAIT_2FA
             # Code was valid, but 2FA password required
-            # Save session state (still contains phone_code_hash) so we can retry with password
-            await save_session(tenant_id, client, db, authorized=False)
+            # Save session state (still contains phone_code_hash) so we can retry with password;
+            # committed together with whatever this branch ends with.
+            await save_session(tenant_id, client, db, authorized=False, commit=False)
             
             if not body.password:
-                set_last_error(tenant_id, "2FA required", db)
+                await set_last_error(tenant_id, "2FA required", db)
                 raise HTTPException(
                     status_code=403,
                     detail={
@@ -375,93 +578,42 @@ async def auth_verify(
             try:
                 # State: WAIT_2FA -> READY
                 await client.sign_in(password=body.password)
-                # Save fully authorized session
-                await save_session(tenant_id, client, db, authorized=True)
-                # Clear phone_code_hash after successful sign-in
-                if auth:
-                    auth.phone_code_hash = None
-                    db.commit()
-                logger.info(f"Tenant {tenant_id}: 2FA sign-in successful (state: READY)")
+                # Save fully authorized session and clear phone_code_hash in one commit
+                await save_session(tenant_id, client, db, authorized=True, commit=False)
+                auth.phone_code_hash = None
+                await db.commit()
+                forget_tenant_entities(str(tenant_id))
+                _resend_deadline.pop(tenant_id, None)
+                logger.info("Tenant %s: 2FA sign-in successful (state: READY)", tenant_id)
                 # Start dispatcher if callback_url is set
                 if tenant.callback_url:
-                    await start_dispatcher(tenant_id, tenant.callback_url)
+                    _start_dispatcher_soon(tenant)
                 # Return early - don't fall through to the normal success path
                 return AuthVerifyResponse()
             except tg_errors.PasswordHashInvalidError:
-                set_last_error(tenant_id, "Invalid 2FA password", db)
+                await set_last_error(tenant_id, "Invalid 2FA password", db)
                 raise HTTPException(
                     status_code=400,
                     detail={"error": "invalid_password", "message": "Invalid 2FA password."},
                 ) from None
             except Exception as e:
                 msg = str(e) or type(e).__name__
-                set_last_error(tenant_id, msg, db)
+                await set_last_error(tenant_id, msg, db)
                 raise HTTPException(status_code=400, detail={"error": "sign_in_failed", "message": msg}) from e
-        except tg_errors.PhoneCodeInvalidError as e:
-            # Clear phone_code_hash on invalid code
-            logger.warning(f"Tenant {tenant_id}: PhoneCodeInvalidError - {e}")
-            if auth:
-                auth.phone_code_hash = None
-                db.commit()
-            set_last_error(tenant_id, "Invalid code", db)
-            raise HTTPException(
-                status_code=400,
-                detail={"error": "invalid_code", "message": "Invalid OTP code. Please check the code and try again."},
-            ) from None
-        except tg_errors.PhoneCodeExpiredError as e:
-            # Clear phone_code_hash on expired code
-            logger.warning(f"Tenant {tenant_id}: PhoneCodeExpiredError - {e}")
-            if auth:
-                auth.phone_code_hash = None
-                db.commit()
-            set_last_error(tenant_id, "Code expired", db)
-            raise HTTPException(
-                status_code=400,
-                detail={
-                    "error": "code_expired",
-                    "message": "OTP code has expired. Telegram may expire codes immediately if they detect automated usage. Please request a new code by clicking 'Start OTP' again and enter it immediately after receiving it in your Telegram app.",
-                },
-            ) from None
-        except tg_errors.FloodWaitError as e:
-            set_last_error(tenant_id, f"Flood wait: retry after {e.seconds} seconds", db)
-            raise HTTPException(
-                status_code=429,
-                detail={
-                    "error": "flood_wait",
-                    "message": f"Too many attempts. Retry after {e.seconds} seconds.",
-                    "retry_after_seconds": e.seconds,
-                },
-            ) from e
         except Exception as e:
-            # Log the actual exception for debugging
-            logger.error(f"Tenant {tenant_id}: Unexpected error during sign_in: {type(e).__name__}: {e}", exc_info=True)
-            # Clear phone_code_hash on other errors
-            if auth:
-                auth.phone_code_hash = None
-                db.commit()
-            msg = str(e) or type(e).__name__
-            set_last_error(tenant_id, msg, db)
-            # Check if it's actually a code-related error wrapped in a generic exception
-            error_msg = msg
-            if "expired" in msg.lower() or "expire" in msg.lower():
-                error_msg = "OTP code has expired. Request a new one via /auth/start."
-            elif "invalid" in msg.lower() and "code" in msg.lower():
-                error_msg = "Invalid OTP code. Please check the code and try again."
-            raise HTTPException(status_code=400, detail={"error": "sign_in_failed", "message": error_msg}) from e
-
-        # Save fully authorized session (state: READY)
-        await save_session(tenant_id, client, db, authorized=True)
+            raise await _sign_in_error(tenant_id, auth, e, db) from e
+
+        # Save fully authorized session (state: READY) and clear phone_code_hash
+        # (no longer needed) in a single commit
+        await save_session(tenant_id, client, db, authorized=True, commit=False)
+        auth.phone_code_hash = None
+        await db.commit()
+        forget_tenant_entities(str(tenant_id))
+        _resend_deadline.pop(tenant_id, None)
         
-        # Clear phone_code_hash after successful sign-in (no longer needed)
-        if auth:
-            auth.phone_code_hash = None
-            db.commit()
-        
-        logger.info(f"Tenant {tenant_id}: Sign-in successful (state: READY)")
+        logger.info("Tenant %s: Sign-in successful (state: READY)", tenant_id)
         if tenant.callback_url:
-            await start_dispatcher(tenant_id, tenant.callback_url)
-    finally:
-        await client.disconnect()
+            _start_dispatcher_soon(tenant)
     return AuthVerifyResponse()
 
 
@@ -478,14 +630,14 @@ async def auth_verify(
 )
 async def auth_resend(
     tenant_id: UUID,
-    db: Session = Depends(get_session),
+    _: None = Depends(_resend_cooldown_gate),  # before db: cooldown 429s skip the session
+    db: AsyncSession = Depends(get_async_session),
 ) -> AuthStartResponse:
     """
     Resend code for the same phone as /auth/start. Uses ResendCodeRequest(phone, phone_code_hash).
     Fails with 429 if still in cooldown (timeout) or FloodWait.
     """
-    _tenant_or_404(tenant_id, db)
-    auth = db.execute(select(TenantAuth).where(TenantAuth.tenant_id == tenant_id)).scalars().first()
+    _, auth = await _load_tenant_and_auth(tenant_id, db)
     if not auth or not auth.session_string or not auth.phone_code_hash or not auth.phone:
         raise HTTPException(
             status_code=400,
@@ -503,15 +655,14 @@ async def auth_resend(
                 "message": f"Wait {cd} seconds before resending.",
                 "retry_after_seconds": cd,
             },
+            headers={"Retry-After": str(cd)},
         )
     phone = auth.phone
-    client = build_client(tenant_id, db)
-    try:
-        await client.connect()
+    async with acquire_client(tenant_id, db) as client:
         try:
             result = await client(functions.auth.ResendCodeRequest(phone, auth.phone_code_hash))
         except tg_errors.FloodWaitError as e:
-            set_last_error(tenant_id, f"Flood wait: retry after {e.seconds} seconds", db)
+            await set_last_error(tenant_id, f"Flood wait: retry after {e.seconds} seconds", db)
             raise HTTPException(
                 status_code=429,
                 detail={
@@ -519,11 +670,12 @@ async def auth_resend(
                     "message": f"Too many attempts. Retry after {e.seconds} seconds.",
                     "retry_after_seconds": e.seconds,
                 },
+                headers={"Retry-After": str(e.seconds)},
             ) from e
         except tg_errors.PhoneCodeExpiredError:
-            set_last_error(tenant_id, "Code expired", db)
+            await set_last_error(tenant_id, "Code expired", db)
             auth.phone_code_hash = None
-            db.commit()
+            await db.commit()
             raise HTTPException(
                 status_code=400,
                 detail={
@@ -532,7 +684,7 @@ async def auth_resend(
                 },
             ) from None
         except tg_errors.SendCodeUnavailableError:
-            set_last_error(tenant_id, "Send code unavailable", db)
+            await set_last_error(tenant_id, "Send code unavailable", db)
             raise HTTPException(
                 status_code=400,
                 detail={
@@ -542,14 +694,14 @@ async def auth_resend(
             ) from None
         except Exception as e:
             msg = str(e) or type(e).__name__
-            set_last_error(tenant_id, msg, db)
+            await set_last_error(tenant_id, msg, db)
             raise HTTPException(
                 status_code=400,
                 detail={"error": "resend_failed", "message": msg},
             ) from e
 
         if isinstance(result, types.auth.SentCodeSuccess):
-            set_last_error(tenant_id, "Already logged in", db)
+            await set_last_error(tenant_id, "Already logged in", db)
             raise HTTPException(
                 status_code=400,
                 detail={"error": "already_logged_in", "message": "Session already authorized."},
@@ -557,11 +709,7 @@ async def auth_resend(
 
         delivery, timeout_seconds, hint = _sent_code_diagnostics(result, tenant_id)
         await save_session(tenant_id, client, db, authorized=False)
-        auth.phone_code_hash = result.phone_code_hash
-        auth.code_requested_at = datetime.now(timezone.utc)
-        auth.code_timeout_seconds = timeout_seconds or 0
-        db.commit()
-        await asyncio.sleep(1.0)
+        await _record_code_request(db, tenant_id, result.phone_code_hash, timeout_seconds)
         return AuthStartResponse(
             ok=True,
             message="Code resent.",
@@ -569,8 +717,6 @@ async def auth_resend(
             timeout_seconds=timeout_seconds or 0,
             hint=hint,
         )
-    finally:
-        await client.disconnect()
 
 
 @router.post(
@@ -582,19 +728,28 @@ async def auth_resend(
 )
 async def logout(
     tenant_id: UUID,
-    db: Session = Depends(get_session),
+    db: AsyncSession = Depends(get_async_session),
 ) -> LogoutResponse:
-    _tenant_or_404(tenant_id, db)
-    await stop_dispatcher(tenant_id)
-    client = build_client(tenant_id, db)
+    await _tenant_or_404(tenant_id, db)
+    # Stop the dispatcher while we read the auth row and connect; wait for it before log_out().
+    stop_task = asyncio.create_task(stop_dispatcher(tenant_id))
     try:
-        await client.connect()
-        if await client.is_user_authorized():
-            try:
-                await client.log_out()
-            except Exception:
-                pass
+        authorized = (
+            await db.execute(select(TenantAuth.authorized).where(TenantAuth.tenant_id == tenant_id))
+        ).scalar_one_or_none()
+        # Only a stored authorized session needs log_out(); otherwise skip the MTProto connect.
+        if authorized:
+            async with acquire_client(tenant_id, db) as client:
+                await stop_task
+                if await client.is_user_authorized():
+                    try:
+                        await client.log_out()
+                    except Exception:
+                        pass
     finally:
-        await client.disconnect()
-    clear_session(tenant_id, db)
+        await stop_task
+    await clear_session(tenant_id, db)
+    forget_tenant_entities(str(tenant_id))
+    _tenant_cache.pop(tenant_id, None)
+    _resend_deadline.pop(tenant_id, None)
     return LogoutResponse()
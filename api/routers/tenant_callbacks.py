@@ -3,12 +3,13 @@
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from callback_dispatch import send_test_callback
-from database import get_session
+from callback_dispatch import reenable_callback, send_test_callback
+from database import get_async_session
 from models.tenant import Tenant
+from routers.tenant_auth import forget_cached_tenant
 from schemas import CallbackTestResponse, ErrorResponse
 
 router = APIRouter(
@@ -26,13 +27,19 @@ router = APIRouter(
         404: {"model": ErrorResponse, "description": "Tenant not found"},
     },
     summary="Send test callback",
-    description="POST a test message payload to the tenant's callback_url.",
+    description=(
+        "POST a test message payload to the tenant's callback_url. On success, a callback "
+        "disabled by an earlier 410 Gone is enabled again."
+    ),
 )
 async def callback_test(
     tenant_id: UUID,
-    db: Session = Depends(get_session),
+    db: AsyncSession = Depends(get_async_session),
 ) -> CallbackTestResponse:
-    row = db.execute(select(Tenant).where(Tenant.id == tenant_id)).scalars().first()
+    # .first() rather than a scalar: a missing tenant (404) and a NULL callback_url (400) differ.
+    row = (
+        await db.execute(select(Tenant.callback_url, Tenant.callback_disabled_at).where(Tenant.id == tenant_id))
+    ).first()
     if not row:
         raise HTTPException(
             status_code=404,
@@ -49,4 +56,10 @@ async def callback_test(
             status_code=400,
             detail={"error": "callback_failed", "message": err or "Test callback failed."},
         )
+    if row.callback_disabled_at is not None:
+        # The endpoint is accepting callbacks again: lift the 410 Gone disable.
+        await db.execute(update(Tenant).where(Tenant.id == tenant_id).values(callback_disabled_at=None))
+        await db.commit()
+        forget_cached_tenant(tenant_id)
+        reenable_callback(tenant_id)
     return CallbackTestResponse()
@@ -1,8 +1,13 @@
 """
-Tenant-scoped send-message endpoint with per-tenant rate limiting.
+Tenant-scoped send-message endpoints (single peer, or a batch of peers via
+resolve_peers) with per-tenant rate limiting.
 
-Rate limiting: see `rate_limit` module docstring. In-memory sliding window per tenant;
-returns 429 when exceeded.
+DB access is async (AsyncSession) or off the event loop (message_writer), so a slow query
+never stalls other tenants' requests on the same worker.
+
+Rate limiting: see `rate_limit` module docstring. Per tenant: a Redis sliding window
+shared by all workers when REDIS_URL is set (`rate_limit_redis`), else the in-memory
+token bucket; returns 429 (with a Retry-After header) when exceeded.
 
 Peer resolution: see `peer_resolver` module. Username, user_id, or phone (E.164).
 Phone: resolve existing contact, or import via ImportContacts when allow_import_contact;
@@ -10,28 +15,31 @@ else PHONE_NOT_IN_CONTACTS or PHONE_NOT_IN_CONTACTS_OR_NOT_ON_TELEGRAM.
 """
 
 import logging
+import math
 from datetime import datetime, timezone
+from typing import Any
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, lambda_stmt, select
 from telethon import errors as tg_errors
 from telethon.tl.types import User
 
-from database import get_session, SessionLocal
+from database import AsyncSessionLocal
+from message_writer import enqueue_outbound
 from models.tenant import Tenant
-from models.message import Message
-from peer_resolver import resolve_peer
-from rate_limit import check_rate_limit
+from peer_resolver import resolve_peer, resolve_peers
+from rate_limit_redis import check_rate_limit_redis
 from schemas import (
     ErrorResponse,
     ReadReceiptRequest,
     ReadReceiptResponse,
+    SendBatchRequest,
+    SendBatchResponse,
     SendMessageRequest,
     SendMessageResponse,
 )
-from telethon_manager import build_client
+from telethon_manager import acquire_client, evict_client
 
 logger = logging.getLogger(__name__)
 
@@ -42,14 +50,112 @@ router = APIRouter(
 )
 
 
-def _tenant_or_404(tenant_id: UUID, db: Session) -> Tenant:
-    row = db.execute(select(Tenant).where(Tenant.id == tenant_id)).scalars().first()
-    if not row:
+# Built and cache-keyed once (lambda statement), not on every request.
+_TENANT_EXISTS_STMT = lambda_stmt(lambda: select(Tenant.id).where(Tenant.id == bindparam("tenant_id")))
+
+
+async def valid_tenant_id(tenant_id: UUID) -> UUID:
+    """
+    Path dependency: the tenant_id if the tenant exists, else 404 (id-only probe; no ORM
+    row is loaded). Uses its own short AsyncSession rather than a request-scoped one, so
+    the connection goes back to the pool before the (slow) Telegram call.
+    """
+    async with AsyncSessionLocal() as db:
+        found = (await db.execute(_TENANT_EXISTS_STMT, {"tenant_id": tenant_id})).scalar()
+    if found is None:
         raise HTTPException(
             status_code=404,
             detail={"error": "not_found", "message": "Tenant not found."},
         )
-    return row
+    return tenant_id
+
+
+async def _session_revoked(tenant_id: UUID, e: Exception) -> HTTPException:
+    """
+    Telethon caches is_user_authorized() on the (pooled) client, so a session revoked on
+    Telegram's side only surfaces as an auth error on a real call. Drop the pooled client
+    so the next request re-checks authorization, and answer 401.
+    """
+    logger.warning("Session rejected by Telegram tenant=%s: %s", tenant_id, type(e).__name__)
+    await evict_client(tenant_id)
+    return HTTPException(
+        status_code=401,
+        detail={"error": "unauthorized", "message": "Tenant not logged in. Use /auth/start and /auth/verify."},
+    )
+
+
+async def _rate_limit_error(tenant_id: UUID, message: str) -> HTTPException | None:
+    """429 (with Retry-After) if the tenant is over its rate limit, else None."""
+    allowed, retry_after = await check_rate_limit_redis(tenant_id)
+    if allowed:
+        return None
+    retry_after_seconds = math.ceil(retry_after) if retry_after is not None else 60
+    return HTTPException(
+        status_code=429,
+        detail={
+            "error": "rate_limited",
+            "message": message,
+            "retry_after_seconds": retry_after_seconds,
+        },
+        headers={"Retry-After": str(retry_after_seconds)},
+    )
+
+
+async def _send_text(client: Any, tenant_id: UUID, entity: Any, text: str, peer_resolved: str) -> Any:
+    """client.send_message, with Telegram errors mapped to the endpoint's HTTPExceptions."""
+    try:
+        return await client.send_message(entity, text)
+    except tg_errors.FloodWaitError as e:
+        logger.warning("send_message: FloodWait tenant=%s seconds=%s", tenant_id, e.seconds)
+        raise HTTPException(
+            status_code=429,
+            detail={
+                "error": "flood_wait",
+                "message": f"Telegram rate limit. Retry after {e.seconds} seconds.",
+                "retry_after_seconds": e.seconds,
+            },
+            headers={"Retry-After": str(e.seconds)},
+        ) from e
+    except tg_errors.UnauthorizedError as e:
+        raise await _session_revoked(tenant_id, e) from e
+    except tg_errors.ChatWriteForbiddenError:
+        logger.warning("send_message: ChatWriteForbidden tenant=%s peer=%s", tenant_id, peer_resolved)
+        raise HTTPException(
+            status_code=400,
+            detail={"error": "cannot_send", "message": "Cannot write to this peer."},
+        ) from None
+    except Exception as e:
+        logger.exception("send_message: send failed tenant=%s peer=%s", tenant_id, peer_resolved)
+        raise HTTPException(
+            status_code=400,
+            detail={"error": "send_failed", "message": str(e) or type(e).__name__},
+        ) from e
+
+
+def _enqueue_sent(tenant_id: UUID, entity: Any, msg: Any, text: str) -> None:
+    """Queue the sent message's row for the batched background writer (see message_writer)."""
+    chat_id = getattr(entity, "id", None)
+    if chat_id is None:
+        return
+    username = phone_number = None
+    if isinstance(entity, User):
+        # Telethon User fields are already str | None; "" is stored as NULL.
+        username = entity.username or None
+        phone_number = entity.phone or None
+    date_utc = msg.date if (getattr(msg.date, "tzinfo", None) is not None) else msg.date.replace(tzinfo=timezone.utc)
+    enqueue_outbound(
+        {
+            "tenant_id": tenant_id,
+            "chat_id": chat_id,
+            "message_id": msg.id,
+            "username": username,
+            "phone_number": phone_number,
+            "text": text,
+            "sender_id": None,
+            "date": date_utc,
+            "incoming": False,
+        }
+    )
 
 
 @router.post(
@@ -69,26 +175,14 @@ def _tenant_or_404(tenant_id: UUID, db: Session) -> Tenant:
     ),
 )
 async def send_message(
-    tenant_id: UUID,
     body: SendMessageRequest,
-    db: Session = Depends(get_session),
-) -> SendMessageResponse:
-    _tenant_or_404(tenant_id, db)
+    tenant_id: UUID = Depends(valid_tenant_id),
+) -> dict[str, Any]:
+    limited = await _rate_limit_error(tenant_id, "Too many send requests. Retry later.")
+    if limited is not None:
+        raise limited
 
-    allowed, retry_after = check_rate_limit(tenant_id)
-    if not allowed:
-        raise HTTPException(
-            status_code=429,
-            detail={
-                "error": "rate_limited",
-                "message": "Too many send requests. Retry later.",
-                "retry_after_seconds": int(retry_after) if retry_after is not None else 60,
-            },
-        )
-
-    client = build_client(tenant_id, db)
-    try:
-        await client.connect()
+    async with acquire_client(tenant_id) as client:
         if not await client.is_user_authorized():
             raise HTTPException(
                 status_code=401,
@@ -102,77 +196,90 @@ async def send_message(
             tenant_id=str(tenant_id),
         )
 
-        try:
-            msg = await client.send_message(entity, body.text)
-        except tg_errors.FloodWaitError as e:
-            logger.warning("send_message: FloodWait tenant=%s seconds=%s", tenant_id, e.seconds)
-            raise HTTPException(
-                status_code=429,
-                detail={
-                    "error": "flood_wait",
-                    "message": f"Telegram rate limit. Retry after {e.seconds} seconds.",
-                    "retry_after_seconds": e.seconds,
-                },
-            ) from e
-        except tg_errors.ChatWriteForbiddenError:
-            logger.warning("send_message: ChatWriteForbidden tenant=%s peer=%s", tenant_id, peer_resolved)
-            raise HTTPException(
-                status_code=400,
-                detail={"error": "cannot_send", "message": "Cannot write to this peer."},
-            ) from None
-        except Exception as e:
-            logger.exception("send_message: send failed tenant=%s peer=%s", tenant_id, peer_resolved)
+        msg = await _send_text(client, tenant_id, entity, body.text, peer_resolved)
+        # Persisted by the batched background writer (see message_writer).
+        _enqueue_sent(tenant_id, entity, msg, body.text)
+
+        date_str = msg.date.isoformat()  # Telethon: always a (UTC) datetime
+        return {"ok": True, "peer_resolved": peer_resolved, "message_id": msg.id, "date": date_str}
+
+
+@router.post(
+    "/messages/send-batch",
+    response_model=SendBatchResponse,
+    responses={
+        401: {"model": ErrorResponse, "description": "Tenant not authorized"},
+        404: {"model": ErrorResponse, "description": "Tenant not found"},
+        429: {"model": ErrorResponse, "description": "Rate limited before anything was sent"},
+    },
+    summary="Send message to several peers",
+    description=(
+        "Send the same text to up to 100 peers (same forms as /messages/send). Peers are resolved "
+        "together: lookups run concurrently and phones not in contacts are imported in one "
+        "ImportContacts request. Each recipient counts against the per-tenant rate limit. "
+        "Returns one result per peer, in order; a failed recipient carries the error "
+        "/messages/send would have returned. After a rate limit or Telegram flood wait, the "
+        "remaining recipients are not attempted and carry that error."
+    ),
+)
+async def send_message_batch(
+    body: SendBatchRequest,
+    tenant_id: UUID = Depends(valid_tenant_id),
+) -> dict[str, Any]:
+    # The first recipient's token is taken up front, so a limited tenant gets a plain 429
+    # before any Telegram call (including contact imports).
+    stop = await _rate_limit_error(tenant_id, "Too many send requests. Retry later.")
+    if stop is not None:
+        raise stop
+
+    async with acquire_client(tenant_id) as client:
+        if not await client.is_user_authorized():
             raise HTTPException(
-                status_code=400,
-                detail={"error": "send_failed", "message": str(e) or type(e).__name__},
-            ) from e
+                status_code=401,
+                detail={"error": "unauthorized", "message": "Tenant not logged in. Use /auth/start and /auth/verify."},
+            )
 
-        date_str = msg.date.isoformat() if hasattr(msg.date, "isoformat") else str(msg.date)
-        
-        # Save outbound message to database (dedicated session so commit is always persisted)
-        try:
-            username = None
-            phone_number = None
-            chat_id = getattr(entity, "id", None)
-            if isinstance(entity, User):
-                un = getattr(entity, "username", None)
-                username = str(un) if un else None
-                ph = getattr(entity, "phone", None)
-                phone_number = str(ph) if ph else None
-                chat_id = entity.id
-            if chat_id is not None:
-                date_utc = msg.date if (getattr(msg.date, "tzinfo", None) is not None) else msg.date.replace(tzinfo=timezone.utc)
-                with SessionLocal() as session:
-                    message = Message(
-                        tenant_id=tenant_id,
-                        chat_id=chat_id,
-                        message_id=msg.id,
-                        username=username,
-                        phone_number=phone_number,
-                        text=body.text,
-                        sender_id=None,
-                        date=date_utc,
-                        incoming=False,
-                    )
-                    session.add(message)
-                    session.commit()
-                logger.info(
-                    "Saved outbound message tenant_id=%s chat_id=%s message_id=%s",
-                    tenant_id,
-                    chat_id,
-                    msg.id,
-                )
-        except Exception as e:
-            logger.exception("Failed to save outbound message tenant_id=%s error=%s", tenant_id, e)
-        
-        return SendMessageResponse(
-            ok=True,
-            peer_resolved=peer_resolved,
-            message_id=msg.id,
-            date=date_str,
+        resolved = await resolve_peers(
+            client,
+            body.peers,
+            allow_import_contact=body.allow_import_contact,
+            tenant_id=str(tenant_id),
         )
-    finally:
-        await client.disconnect()
+
+        results: list[dict[str, Any]] = []
+        prepaid = True
+        for peer, r in zip(body.peers, resolved):
+            if not isinstance(r, HTTPException):
+                if prepaid:
+                    prepaid = False
+                elif stop is None:
+                    stop = await _rate_limit_error(tenant_id, "Too many send requests. Retry later.")
+                if stop is not None:
+                    r = stop
+            if isinstance(r, HTTPException):
+                results.append({"peer": peer, "ok": False, "error": r.detail})
+                continue
+            entity, peer_resolved = r
+            try:
+                msg = await _send_text(client, tenant_id, entity, body.text, peer_resolved)
+            except HTTPException as e:
+                if e.status_code == 401:
+                    raise
+                if e.status_code == 429:
+                    stop = e
+                results.append({"peer": peer, "ok": False, "error": e.detail})
+                continue
+            _enqueue_sent(tenant_id, entity, msg, body.text)
+            results.append(
+                {
+                    "peer": peer,
+                    "ok": True,
+                    "peer_resolved": peer_resolved,
+                    "message_id": msg.id,
+                    "date": msg.date.isoformat(),
+                }
+            )
+        return {"results": results}
 
 
 @router.post(
@@ -192,26 +299,14 @@ async def send_message(
     ),
 )
 async def send_read_receipt(
-    tenant_id: UUID,
     body: ReadReceiptRequest,
-    db: Session = Depends(get_session),
-) -> ReadReceiptResponse:
-    _tenant_or_404(tenant_id, db)
-
-    allowed, retry_after = check_rate_limit(tenant_id)
-    if not allowed:
-        raise HTTPException(
-            status_code=429,
-            detail={
-                "error": "rate_limited",
-                "message": "Too many requests. Retry later.",
-                "retry_after_seconds": int(retry_after) if retry_after is not None else 60,
-            },
-        )
+    tenant_id: UUID = Depends(valid_tenant_id),
+) -> dict[str, Any]:
+    limited = await _rate_limit_error(tenant_id, "Too many requests. Retry later.")
+    if limited is not None:
+        raise limited
 
-    client = build_client(tenant_id, db)
-    try:
-        await client.connect()
+    async with acquire_client(tenant_id) as client:
         if not await client.is_user_authorized():
             raise HTTPException(
                 status_code=401,
@@ -236,7 +331,10 @@ async def send_read_receipt(
                     "message": f"Telegram rate limit. Retry after {e.seconds} seconds.",
                     "retry_after_seconds": e.seconds,
                 },
+                headers={"Retry-After": str(e.seconds)},
             ) from e
+        except tg_errors.UnauthorizedError as e:
+            raise await _session_revoked(tenant_id, e) from e
         except Exception as e:
             logger.exception("send_read_receipt: failed tenant=%s peer=%s max_id=%s", tenant_id, body.peer, body.max_id)
             raise HTTPException(
@@ -244,6 +342,4 @@ async def send_read_receipt(
                 detail={"error": "read_receipt_failed", "message": str(e) or type(e).__name__},
             ) from e
 
-        return ReadReceiptResponse(ok=True, message="Read receipt sent.")
-    finally:
-        await client.disconnect()
+        return {"ok": True, "message": "Read receipt sent."}
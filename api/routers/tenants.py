@@ -1,36 +1,81 @@
-"""Tenant list and create."""
+"""Tenant list, create and update."""
 
+from collections.abc import Iterator
+from typing import Any
 from uuid import UUID
 
+import orjson
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import select
+from fastapi.responses import StreamingResponse
+from sqlalchemy import bindparam, lambda_stmt, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
-from database import get_session
+from callback_dispatch import reenable_callback, start_dispatcher, stop_dispatcher
+from database import SessionLocal, get_async_session, get_session
 from models.tenant import Tenant
-from schemas import CreateTenantRequest, TenantResponse
+from models.tenant_auth import TenantAuth
+from routers.tenant_auth import forget_cached_tenant
+from schemas import CreateTenantRequest, TenantResponse, UpdateTenantRequest
 
 router = APIRouter(prefix="/tenants", tags=["tenants"])
 
 
-def _tenant_response(t: Tenant) -> TenantResponse:
-    return TenantResponse(
-        id=str(t.id),
-        name=t.name,
-        callback_url=t.callback_url,
-        created_at=t.created_at.isoformat() if t.created_at else "",
+def _tenant_response(t: Tenant) -> dict[str, Any]:
+    """TenantResponse fields as a plain dict; validated once against response_model."""
+    return {
+        "id": str(t.id),
+        "name": t.name,
+        "callback_url": t.callback_url,
+        "created_at": t.created_at.isoformat() if t.created_at else "",
+    }
+
+
+_LIST_BATCH = 200
+
+
+def _stream_tenants() -> Iterator[bytes]:
+    """
+    JSON array of tenants, encoded one batch of _LIST_BATCH rows at a time as they are
+    fetched (server-side cursor). Uses its own session: yield dependencies are
+    closed before a streaming body is sent.
+    """
+    stmt = (
+        select(Tenant.id, Tenant.name, Tenant.callback_url, Tenant.created_at)
+        .order_by(Tenant.created_at.desc())
+        .execution_options(yield_per=_LIST_BATCH)
     )
+    yield b"["
+    with SessionLocal() as db:
+        # One chunk per fetched batch: Starlette hops to the threadpool per yielded chunk.
+        for n, batch in enumerate(db.execute(stmt).partitions()):
+            items = [
+                {
+                    "id": str(r.id),
+                    "name": r.name,
+                    "callback_url": r.callback_url,
+                    "created_at": r.created_at.isoformat() if r.created_at else "",
+                }
+                for r in batch
+            ]
+            # Encode the batch as one array and drop its brackets to splice it in.
+            yield (b"," if n else b"") + orjson.dumps(items)[1:-1]
+    yield b"]"
 
 
 @router.get("", response_model=list[TenantResponse])
-def list_tenants(db: Session = Depends(get_session)) -> list[TenantResponse]:
-    rows = db.execute(select(Tenant).order_by(Tenant.created_at.desc())).scalars().all()
-    return [_tenant_response(r) for r in rows]
+def list_tenants() -> StreamingResponse:
+    # Same shape as TenantResponse; streamed, so not re-validated against response_model.
+    return StreamingResponse(_stream_tenants(), media_type="application/json")
+
+
+# Built and cache-keyed once (lambda statement), not on every request.
+_TENANT_STMT = lambda_stmt(lambda: select(Tenant).where(Tenant.id == bindparam("tenant_id")))
 
 
 @router.get("/{tenant_id}", response_model=TenantResponse)
-def get_tenant(tenant_id: UUID, db: Session = Depends(get_session)) -> TenantResponse:
-    row = db.execute(select(Tenant).where(Tenant.id == tenant_id)).scalars().first()
+def get_tenant(tenant_id: UUID, db: Session = Depends(get_session)) -> dict[str, Any]:
+    row = db.execute(_TENANT_STMT, {"tenant_id": tenant_id}).scalar_one_or_none()
     if not row:
         raise HTTPException(status_code=404, detail={"error": "not_found", "message": "Tenant not found."})
     return _tenant_response(row)
@@ -40,10 +85,39 @@ def get_tenant(tenant_id: UUID, db: Session = Depends(get_session)) -> TenantRes
 def create_tenant(
     body: CreateTenantRequest,
     db: Session = Depends(get_session),
-) -> TenantResponse:
+) -> dict[str, Any]:
     cb = (body.callback_url or "").strip() or None
     t = Tenant(name=body.name.strip(), callback_url=cb)
     db.add(t)
     db.commit()
     db.refresh(t)
     return _tenant_response(t)
+
+
+@router.patch("/{tenant_id}", response_model=TenantResponse)
+async def update_tenant(
+    tenant_id: UUID,
+    body: UpdateTenantRequest,
+    db: AsyncSession = Depends(get_async_session),
+) -> dict[str, Any]:
+    """
+    Set or clear callback_url. Clears callback_disabled_at (a new or re-set URL gets a
+    fresh chance after a 410 Gone) and restarts the dispatcher of an authorized tenant on
+    the new URL.
+    """
+    t = (await db.execute(select(Tenant).where(Tenant.id == tenant_id))).scalar_one_or_none()
+    if not t:
+        raise HTTPException(status_code=404, detail={"error": "not_found", "message": "Tenant not found."})
+    t.callback_url = (body.callback_url or "").strip() or None
+    t.callback_disabled_at = None
+    authorized = (
+        await db.execute(select(TenantAuth.authorized).where(TenantAuth.tenant_id == tenant_id))
+    ).scalar_one_or_none()
+    await db.commit()
+    forget_cached_tenant(tenant_id)
+    reenable_callback(tenant_id)
+    # The dispatcher is bound to the URL it was started with.
+    await stop_dispatcher(tenant_id)
+    if authorized and t.callback_url:
+        await start_dispatcher(tenant_id, t.callback_url)
+    return _tenant_response(t)
@@ -1,13 +1,62 @@
 """Pydantic schemas for tenant auth API."""
 
-from pydantic import BaseModel, Field
-
-
-class AuthStartRequest(BaseModel):
+import re
+from typing import Annotated
+
+from pydantic import BaseModel, Field, field_validator
+
+# E.164 is at most 15 digits plus "+"; leaves room for spaces/dashes/parentheses.
+MAX_PHONE_INPUT_LEN = 32
+# Longest peer accepted by the message endpoints: usernames are at most 32 characters,
+# ids about 20 digits, phones MAX_PHONE_INPUT_LEN.
+MAX_PEER_INPUT_LEN = 64
+# Separators allowed in user input; stripped before validation.
+PHONE_JUNK_RE = re.compile(r"[\s\-()]")
+_E164_RE = re.compile(r"^\+\d{10,15}$")
+
+
+def _normalize_e164(phone: str) -> tuple[str | None, str | None]:
+    """
+    Normalize phone to strict E.164 (+<country><number>).
+    Reject if missing + or contains invalid chars (spaces/dashes/parentheses allowed but stripped).
+    Returns (normalized, None) or (None, error_message).
+    """
+    if not phone or not isinstance(phone, str):
+        return None, "Phone number is required."
+    s = phone.strip()
+    if len(s) > MAX_PHONE_INPUT_LEN:
+        return None, "Phone too long."
+    s = PHONE_JUNK_RE.sub("", s)
+    if _E164_RE.match(s):
+        return s, None
+    # Slow path: only to pick the error message.
+    if not s.startswith("+"):
+        return None, "Phone must be in E.164 format: +<country><number> (e.g. +79001234567)."
+    digits = s[1:]
+    if not digits or not digits.isdigit():
+        return None, "Phone must contain only + followed by digits (E.164)."
+    if len(digits) < 10:
+        return None, "Phone number too short for E.164."
+    return None, "Phone number too long for E.164."
+
+
+class _E164PhoneRequest(BaseModel):
+    """Request with a `phone` field, normalized to E.164 at parse time (invalid -> 400 invalid_phone, see main)."""
+
+    @field_validator("phone", check_fields=False)
+    @classmethod
+    def _normalize_phone(cls, v: str) -> str:
+        normalized, err = _normalize_e164(v)
+        if err:
+            raise ValueError(err)
+        return normalized
+
+
+class AuthStartRequest(_E164PhoneRequest):
     phone: str = Field(..., description="Phone number in international format (e.g. +1234567890)")
 
 
-class AuthVerifyRequest(BaseModel):
+class AuthVerifyRequest(_E164PhoneRequest):
     phone: str = Field(..., description="Same phone used in /auth/start")
     code: str = Field(..., description="OTP code from Telegram (SMS or in-app)")
     password: str | None = Field(
@@ -50,6 +99,7 @@ class ErrorResponse(BaseModel):
 class SendMessageRequest(BaseModel):
     peer: str = Field(
         ...,
+        max_length=MAX_PEER_INPUT_LEN,
         description='Target: "me" (Saved Messages), @username, numeric user/chat id, or phone number in E.164 format (e.g. +79001234567)',
     )
     text: str = Field(..., description="Message text to send")
@@ -66,9 +116,41 @@ class SendMessageResponse(BaseModel):
     date: str = Field(..., description="ISO datetime when message was sent")
 
 
+# Recipients per POST /messages/send-batch.
+SEND_BATCH_MAX_PEERS = 100
+
+
+class SendBatchRequest(BaseModel):
+    peers: list[Annotated[str, Field(max_length=MAX_PEER_INPUT_LEN)]] = Field(
+        ...,
+        min_length=1,
+        max_length=SEND_BATCH_MAX_PEERS,
+        description='Recipients, each in any form accepted by /messages/send ("me", @username, numeric id, or phone E.164)',
+    )
+    text: str = Field(..., description="Message text to send to every recipient")
+    allow_import_contact: bool = Field(
+        True,
+        description="If true, import phones not in contacts (together, not one request per number). If false, those recipients fail with PHONE_NOT_IN_CONTACTS.",
+    )
+
+
+class SendBatchItem(BaseModel):
+    peer: str = Field(..., description="Recipient as given in the request")
+    ok: bool
+    peer_resolved: str | None = None
+    message_id: int | None = None
+    date: str | None = None
+    error: ErrorResponse | None = Field(None, description="Why this recipient failed (same errors as /messages/send)")
+
+
+class SendBatchResponse(BaseModel):
+    results: list[SendBatchItem] = Field(..., description="One item per requested peer, in request order")
+
+
 class ReadReceiptRequest(BaseModel):
     peer: str = Field(
         ...,
+        max_length=MAX_PEER_INPUT_LEN,
         description='Chat to mark as read: "me", @username, numeric user/chat id, or phone E.164. Same as send.',
     )
     max_id: int = Field(..., ge=0, description="Last message ID to mark as read (all messages with id <= max_id)")
@@ -84,6 +166,10 @@ class CreateTenantRequest(BaseModel):
     callback_url: str | None = Field(None, max_length=2048)
 
 
+class UpdateTenantRequest(BaseModel):
+    callback_url: str | None = Field(None, max_length=2048, description="New callback URL; null or empty clears it")
+
+
 class TenantResponse(BaseModel):
     id: str
     name: str
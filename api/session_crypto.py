@@ -1,11 +1,31 @@
-"""Fernet encryption for Telethon session strings. Session strings are secret; treat like passwords."""
+"""
+Encryption for Telethon session strings. Session strings are secret; treat like passwords.
 
+New ciphertexts are AES-256-GCM ("v2:" + urlsafe base64 of nonce || ciphertext || tag),
+with the AES key derived from SESSION_ENC_KEY via HKDF. Legacy Fernet tokens (written
+before v2) still decrypt; they are replaced with v2 the next time the session is saved.
+"""
+
+import base64
+import binascii
+import os
+from functools import lru_cache
+
+from cryptography.exceptions import InvalidTag
 from cryptography.fernet import Fernet, InvalidToken
+from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+from cryptography.hazmat.primitives.kdf.hkdf import HKDF
 
 from config import SESSION_ENC_KEY
 
+_GCM_PREFIX = "v2:"
+_GCM_NONCE_LEN = 12
 
+
+@lru_cache(maxsize=1)
 def _fernet() -> Fernet:
+    """Fernet for SESSION_ENC_KEY, built once per process (a missing key is not cached)."""
     raw = (SESSION_ENC_KEY or "").strip()
     if not raw:
         raise ValueError(
@@ -17,16 +37,38 @@ def _fernet() -> Fernet:
     return Fernet(key)
 
 
+@lru_cache(maxsize=1)
+def _aesgcm() -> AESGCM:
+    """AES-256-GCM keyed by HKDF(SESSION_ENC_KEY), so the Fernet key bytes are not reused as-is."""
+    _fernet()  # validates SESSION_ENC_KEY (set, 32 url-safe base64 bytes)
+    master = base64.urlsafe_b64decode(SESSION_ENC_KEY.strip())
+    key = HKDF(algorithm=hashes.SHA256(), length=32, salt=None, info=b"tenant-session-aesgcm-v2").derive(master)
+    return AESGCM(key)
+
+
 def encrypt_session(session_string: str) -> str:
-    """Encrypt a Telethon session string for storage."""
-    return _fernet().encrypt(session_string.encode("utf-8")).decode("ascii")
+    """Encrypt a Telethon session string for storage (AES-GCM, v2 format)."""
+    nonce = os.urandom(_GCM_NONCE_LEN)
+    sealed = _aesgcm().encrypt(nonce, session_string.encode("utf-8"), None)
+    return _GCM_PREFIX + base64.urlsafe_b64encode(nonce + sealed).decode("ascii")
+
+
+# Keyed by ciphertext: a rotated session is a new key, so entries never go stale.
+@lru_cache(maxsize=1024)
+def _decrypt_cached(encrypted: str) -> str:
+    if encrypted.startswith(_GCM_PREFIX):
+        blob = base64.urlsafe_b64decode(encrypted[len(_GCM_PREFIX):])
+        if len(blob) <= _GCM_NONCE_LEN:
+            raise InvalidTag()
+        return _aesgcm().decrypt(blob[:_GCM_NONCE_LEN], blob[_GCM_NONCE_LEN:], None).decode("utf-8")
+    return _fernet().decrypt(encrypted.encode("ascii")).decode("utf-8")
 
 
 def decrypt_session(encrypted: str) -> str:
-    """Decrypt a stored session string."""
+    """Decrypt a stored session string, v2 or legacy Fernet (memoized per ciphertext)."""
     try:
-        return _fernet().decrypt(encrypted.encode("ascii")).decode("utf-8")
-    except InvalidToken as e:
+        return _decrypt_cached(encrypted)
+    except (InvalidToken, InvalidTag, binascii.Error) as e:
         raise ValueError(
             "Failed to decrypt session string; SESSION_ENC_KEY may have changed."
         ) from e
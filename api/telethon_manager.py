@@ -19,35 +19,97 @@ Why DB storage is needed for multi-tenancy:
 
 from __future__ import annotations
 
+import asyncio
+import logging
+import time
 import uuid
-from datetime import datetime, timezone
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
 
-from sqlalchemy import select
-from sqlalchemy.orm import Session
+from sqlalchemy import bindparam, lambda_stmt, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
 from telethon import TelegramClient
 from telethon.sessions import StringSession
 
 from config import TELEGRAM_API_HASH, TELEGRAM_API_ID
-from database import SessionLocal
+from database import AsyncSessionLocal
 from models.tenant_auth import TenantAuth
 from session_crypto import decrypt_session, encrypt_session
 
+logger = logging.getLogger(__name__)
 
-def _get_or_create_auth(tenant_id: uuid.UUID, db: Session) -> TenantAuth:
-    stmt = select(TenantAuth).where(TenantAuth.tenant_id == tenant_id)
-    row = db.execute(stmt).scalars().first()
-    if row:
-        return row
-    auth = TenantAuth(tenant_id=tenant_id)
-    db.add(auth)
-    db.commit()
-    db.refresh(auth)
-    return auth
+# Connected clients kept per tenant between API calls (e.g. auth_start -> auth_verify
+# reuses the connection that sent the code). Idle ones are disconnected by the reaper.
+CLIENT_IDLE_TTL_SEC = 300
+CLIENT_REAP_INTERVAL_SEC = 60
 
 
-def build_client(
+@dataclass
+class _PooledClient:
+    client: TelegramClient
+    session_key: int  # hash of the stored (encrypted) session string the client matches
+    last_used: float = field(default_factory=time.monotonic)
+    users: int = 0
+    connect_lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+
+
+_pool: dict[uuid.UUID, _PooledClient] = {}
+_reaper_task: asyncio.Task | None = None
+
+
+@asynccontextmanager
+async def _session_scope(db: AsyncSession | None) -> AsyncIterator[AsyncSession]:
+    """Use the caller's session, or open (and close) a short-lived one."""
+    if db is not None:
+        yield db
+        return
+    async with AsyncSessionLocal() as own:
+        yield own
+
+
+async def _get_or_create_auth(tenant_id: uuid.UUID, db: AsyncSession) -> TenantAuth:
+    """
+    TenantAuth row for the tenant, created if missing, in one round-trip:
+    INSERT ... ON CONFLICT (tenant_id) DO UPDATE (no-op) RETURNING. The row is committed
+    together with the caller's changes.
+    """
+    stmt = (
+        pg_insert(TenantAuth)
+        .values(tenant_id=tenant_id)
+        .on_conflict_do_update(index_elements=[TenantAuth.tenant_id], set_={"tenant_id": tenant_id})
+        .returning(TenantAuth)
+    )
+    return (await db.execute(stmt)).scalar_one()
+
+
+# Runs on every acquire_client miss: a lambda statement is built and cache-keyed once.
+_SESSION_STRING_STMT = lambda_stmt(
+    lambda: select(TenantAuth.session_string).where(TenantAuth.tenant_id == bindparam("tenant_id"))
+)
+
+
+async def _load_session_string(tenant_id: uuid.UUID, db: AsyncSession | None) -> str | None:
+    """Encrypted session string for the tenant (single-column SELECT; None if absent)."""
+    async with _session_scope(db) as db:
+        return (await db.execute(_SESSION_STRING_STMT, {"tenant_id": tenant_id})).scalar_one_or_none()
+
+
+def _client_from_session_string(encrypted: str | None) -> TelegramClient:
+    if not TELEGRAM_API_ID or not TELEGRAM_API_HASH:
+        raise ValueError("TELEGRAM_API_ID and TELEGRAM_API_HASH must be set in env.")
+    raw = decrypt_session(encrypted) if encrypted else ""
+    return TelegramClient(
+        StringSession(raw),
+        int(TELEGRAM_API_ID),
+        TELEGRAM_API_HASH,
+    )
+
+
+async def build_client(
     tenant_id: uuid.UUID,
-    db: Session | None = None,
+    db: AsyncSession | None = None,
 ) -> TelegramClient:
     """
     Return a TelegramClient for the given tenant using a StringSession.
@@ -55,35 +117,15 @@ def build_client(
     Loads the tenant's encrypted session from DB, decrypts it, and builds a client.
     If no session exists yet, uses an empty StringSession (for first-time login).
     """
-    if not TELEGRAM_API_ID or not TELEGRAM_API_HASH:
-        raise ValueError("TELEGRAM_API_ID and TELEGRAM_API_HASH must be set in env.")
-
-    own_db = db is None
-    if own_db:
-        db = SessionLocal()
-
-    try:
-        auth = _get_or_create_auth(tenant_id, db)
-        raw = ""
-        if auth.session_string:
-            raw = decrypt_session(auth.session_string)
-        session = StringSession(raw)
-        client = TelegramClient(
-            session,
-            int(TELEGRAM_API_ID),
-            TELEGRAM_API_HASH,
-        )
-        return client
-    finally:
-        if own_db:
-            db.close()
+    return _client_from_session_string(await _load_session_string(tenant_id, db))
 
 
 async def save_session(
     tenant_id: uuid.UUID,
     client: TelegramClient,
-    db: Session | None = None,
+    db: AsyncSession | None = None,
     authorized: bool = True,
+    commit: bool = True,
 ) -> None:
     """
     Persist the client's session string for the tenant (encrypt before storing).
@@ -94,73 +136,65 @@ async def save_session(
         db: Database session (optional)
         authorized: Whether the session is fully authorized (default True).
                     Set False when saving session after send_code_request().
+        commit: Commit immediately (default). Pass False with a caller-owned db to only
+                flush, so the caller can fold this into its own single commit.
     
     Updates TenantAuth with encrypted session_string. If authorized=True,
-    also sets authorized=True and phone (if available).
+    also sets authorized=True and, if no phone is stored yet, phone (via get_me()).
     """
-    own_db = db is None
-    if own_db:
-        db = SessionLocal()
-
-    try:
-        auth = _get_or_create_auth(tenant_id, db)
+    async with _session_scope(db) as db:
+        auth = await _get_or_create_auth(tenant_id, db)
         raw = client.session.save()
         encrypted = encrypt_session(raw)
         auth.session_string = encrypted
         auth.last_error = None
-        auth.updated_at = datetime.now(timezone.utc)
         
         if authorized:
             auth.authorized = True
-            try:
-                me = await client.get_me()
-                if me and me.phone:
-                    auth.phone = me.phone
-            except Exception:
-                pass
+            # /auth/start already stored the phone; only ask Telegram when it is missing.
+            if not auth.phone:
+                try:
+                    me = await client.get_me()
+                    if me and me.phone:
+                        auth.phone = me.phone
+                except Exception:
+                    pass
         # If not authorized, keep existing authorized/phone values
 
         db.add(auth)
-        db.commit()
-    finally:
-        if own_db:
-            db.close()
+        if commit:
+            await db.commit()
+        else:
+            await db.flush()
+        # The pooled client (if this is it) now matches the stored session.
+        entry = _pool.get(tenant_id)
+        if entry is not None and entry.client is client:
+            entry.session_key = hash(encrypted)
 
 
-def set_last_error(
+async def set_last_error(
     tenant_id: uuid.UUID,
     message: str,
-    db: Session | None = None,
+    db: AsyncSession | None = None,
 ) -> None:
     """Store last auth error for the tenant (returned by GET /tenants/{id}/status)."""
-    own_db = db is None
-    if own_db:
-        db = SessionLocal()
-    try:
-        auth = _get_or_create_auth(tenant_id, db)
+    async with _session_scope(db) as db:
+        auth = await _get_or_create_auth(tenant_id, db)
         auth.last_error = message
-        auth.updated_at = datetime.now(timezone.utc)
         db.add(auth)
-        db.commit()
-    finally:
-        if own_db:
-            db.close()
+        await db.commit()
 
 
-def clear_session(
+async def clear_session(
     tenant_id: uuid.UUID,
-    db: Session | None = None,
+    db: AsyncSession | None = None,
 ) -> None:
     """
-    Clear stored session for the tenant (session_string, authorized, phone, last_error).
-    Call after log_out(); does not disconnect or log out the client itself.
+    Clear stored session for the tenant (session_string, authorized, phone, last_error)
+    and drop its pooled client. Call after log_out(); does not log out the client itself.
     """
-    own_db = db is None
-    if own_db:
-        db = SessionLocal()
-
-    try:
-        auth = _get_or_create_auth(tenant_id, db)
+    async with _session_scope(db) as db:
+        auth = await _get_or_create_auth(tenant_id, db)
         auth.session_string = None
         auth.authorized = False
         auth.phone = None
@@ -168,9 +202,102 @@ def clear_session(
         auth.code_requested_at = None
         auth.code_timeout_seconds = None
         auth.last_error = None
-        auth.updated_at = datetime.now(timezone.utc)
         db.add(auth)
-        db.commit()
+        await db.commit()
+    await evict_client(tenant_id)
+
+
+@asynccontextmanager
+async def acquire_client(
+    tenant_id: uuid.UUID,
+    db: AsyncSession | None = None,
+) -> AsyncIterator[TelegramClient]:
+    """
+    Yield a connected TelegramClient for the tenant from the per-tenant pool.
+
+    The client is built (from the stored session) on first use and kept connected after
+    the block exits; concurrent acquirers share it. An idle pooled client is reused only
+    while the stored session string still matches the one it was built from (checked with
+    a single-column SELECT), so sessions replaced elsewhere (another worker, logout) are
+    picked up. clear_session evicts the tenant's client.
+
+    The inbound dispatcher holds the tenant's client for as long as it runs, so API calls
+    and update handling share one client (one MTProto connection per auth key).
+    """
+    entry = _pool.get(tenant_id)
+    if entry is None or entry.users == 0:
+        encrypted = await _load_session_string(tenant_id, db)
+        key = hash(encrypted)
+        entry = _pool.get(tenant_id)
+        if entry is not None and entry.session_key != key and entry.users == 0:
+            await evict_client(tenant_id)
+            entry = None
+        if entry is None:
+            # Another acquirer may have filled the slot while we awaited; keep theirs.
+            entry = _pool.setdefault(tenant_id, _PooledClient(_client_from_session_string(encrypted), key))
+    entry.users += 1
+    try:
+        async with entry.connect_lock:
+            if not entry.client.is_connected():
+                await entry.client.connect()
+        yield entry.client
     finally:
-        if own_db:
-            db.close()
+        entry.users -= 1
+        entry.last_used = time.monotonic()
+        # Evicted while we held it: the last user disconnects it.
+        if entry.users == 0 and _pool.get(tenant_id) is not entry:
+            await entry.client.disconnect()
+
+
+async def evict_client(tenant_id: uuid.UUID) -> None:
+    """
+    Drop the tenant's pooled client; the next acquire rebuilds from DB. A client still in
+    use by another request is disconnected when that request releases it, not under it.
+    """
+    entry = _pool.pop(tenant_id, None)
+    if entry is not None and entry.users == 0:
+        await entry.client.disconnect()
+
+
+async def _reap_idle_clients() -> None:
+    while True:
+        await asyncio.sleep(CLIENT_REAP_INTERVAL_SEC)
+        cutoff = time.monotonic() - CLIENT_IDLE_TTL_SEC
+        idle = [tid for tid, e in _pool.items() if e.users == 0 and e.last_used < cutoff]
+        reaped = 0
+        for tid in idle:
+            try:
+                # Re-check: earlier disconnects awaited, so the entry may have been evicted,
+                # replaced, or acquired since the snapshot.
+                entry = _pool.get(tid)
+                if entry is None or entry.users != 0 or entry.last_used >= cutoff:
+                    continue
+                _pool.pop(tid, None)
+                await entry.client.disconnect()
+                reaped += 1
+            except Exception as e:
+                logger.warning("Error disconnecting idle client tenant_id=%s: %s", tid, e)
+        if reaped:
+            logger.info("Disconnected %d idle Telegram clients", reaped)
+
+
+def start_client_reaper() -> None:
+    """Start the background task that disconnects idle pooled clients. Call from app lifespan."""
+    global _reaper_task
+    if _reaper_task is None:
+        _reaper_task = asyncio.create_task(_reap_idle_clients())
+
+
+async def stop_client_reaper() -> None:
+    """Stop the reaper and disconnect all pooled clients (on shutdown)."""
+    global _reaper_task
+    if _reaper_task is not None:
+        _reaper_task.cancel()
+        try:
+            await _reaper_task
+        except asyncio.CancelledError:
+            pass
+        _reaper_task = None
+    entries = list(_pool.values())
+    _pool.clear()
+    await asyncio.gather(*(e.client.disconnect() for e in entries), return_exceptions=True)